@@ -1,16 +1,105 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import Optional
+from pymongo.asynchronous.database import AsyncDatabase
+from typing import List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
 import logging
 from app.database import get_db
-from app.schemas import RefreshJobsResponse
-from app.services.job_service_mongo import JobService
+from app.schemas import RefreshJobsResponse, SyncStatusResponse
+from app.services.job_service_mongo import JobService, get_job_service, clear_job_meta_cache
+from app.services.matching_service_mongo import clear_match_cache
 from app.scheduler import get_scheduler
+from app.integrations.cts import CTSClient, get_cts_client
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 import asyncio
+import uuid
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Dashboard polling reads /admin/stats far more often than the counts change
+STATS_CACHE_TTL_SECONDS = 30
+
+_stats_cache: TTLCache = TTLCache(maxsize=1, ttl=STATS_CACHE_TTL_SECONDS)
+
+# Jobs sent per CTS batchCreate call during /admin/sync-to-cts (CTS allows up to 200)
+CTS_SYNC_BATCH_SIZE = 100
+
+# Max CTS batchCreate calls in flight
+CTS_SYNC_CONCURRENCY = 8
+
+# Batches buffered between the MongoDB cursor and the CTS workers
+CTS_SYNC_QUEUE_SIZE = 2 * CTS_SYNC_CONCURRENCY
+
+# MongoDB updates per bulk_write when recording CTS job names
+CTS_SYNC_WRITE_BATCH_SIZE = 500
+
+# Log CTS sync progress once per this many processed jobs
+CTS_SYNC_PROGRESS_LOG_INTERVAL = 1000
+
+# Active jobs that have not been pushed to CTS yet
+# (an equality match on null also matches a missing cts_job_name, so this is
+# a single predicate served by the partial cts_unsynced index)
+CTS_UNSYNCED_FILTER = {"status": "active", "cts_job_name": None}
+
+# Only the fields needed to build the CTS job payload
+CTS_SYNC_PROJECTION = {
+    "adzuna_id": 1,
+    "title": 1,
+    "description": 1,
+    "company_display_name": 1,
+    "location": 1,
+    "location_structured": 1,
+    "employment_type": 1,
+    "job_level": 1,
+    "salary_min": 1,
+    "salary_max": 1,
+    "category": 1,
+    "redirect_url": 1,
+    "is_internship": 1
+}
+
+# The Google client is blocking, so CTS calls run on a dedicated pool
+_cts_executor = ThreadPoolExecutor(max_workers=CTS_SYNC_CONCURRENCY, thread_name_prefix="cts-sync")
+
+# Upper bound on how long a sync lock is held if its task dies without releasing it
+SYNC_LOCK_TTL_SECONDS = 3600
+
+
+async def _acquire_sync_lock(db: AsyncDatabase, key: str) -> Optional[str]:
+    """
+    Take a named lock in the sync_locks collection
+    
+    Returns:
+        Owner token to release the lock with, or None if another sync holds it
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=SYNC_LOCK_TTL_SECONDS)
+    owner = uuid.uuid4().hex
+    try:
+        await db.sync_locks.insert_one({"_id": key, "owner": owner, "acquired_at": now, "expires_at": expires_at})
+        return owner
+    except DuplicateKeyError:
+        # Take over a stale lock the TTL monitor has not removed yet
+        stale = await db.sync_locks.find_one_and_update(
+            {"_id": key, "expires_at": {"$lt": now}},
+            {"$set": {"owner": owner, "acquired_at": now, "expires_at": expires_at}}
+        )
+        return owner if stale is not None else None
+
+
+async def _release_sync_lock(db: AsyncDatabase, key: str, owner: str):
+    """
+    Release a lock taken with _acquire_sync_lock. Only the owner's lock is removed,
+    so a run whose stale lock was taken over can't release the new holder's lock.
+    """
+    try:
+        await db.sync_locks.delete_one({"_id": key, "owner": owner})
+    except Exception as e:
+        logger.error(f"Failed to release sync lock {key}: {str(e)}")
+
 
 @router.post("/admin/refresh-jobs", response_model=RefreshJobsResponse)
 async def refresh_jobs_manually(
@@ -18,7 +107,8 @@ async def refresh_jobs_manually(
     search_query: str = None,
     max_pages: int = 20,
     country: str = None,
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db),
+    job_service: JobService = Depends(get_job_service)
 ):
     """
     Manually trigger job refresh from Adzuna
@@ -27,35 +117,49 @@ async def refresh_jobs_manually(
     The sync runs asynchronously in the background.
     
     Returns immediately with a sync ID that can be used to track progress.
+    Returns 409 if a refresh for the same query and country is already running.
     """
+    lock_key = f"refresh-jobs:{search_query}:{country}"
+    lock_owner = await _acquire_sync_lock(db, lock_key)
+    if lock_owner is None:
+        raise HTTPException(status_code=409, detail="Sync already running for this query")
+    
     try:
         logger.info(f"Manual job refresh triggered via API for query: {search_query}, country: {country}")
         
-        # Run in background using FastAPI BackgroundTasks
-        job_service = JobService(db)
+        # Record the sync up front so its ID can be polled via /admin/sync-status
+        if search_query == "ALL_ENGINEERING":
+            sync_log_id = await job_service.create_sync_log("daily_engineering_mass_sync")
+        else:
+            sync_log_id = await job_service.create_sync_log("manual", search_query, country)
         
-        # Start sync asynchronously
+        # Start sync asynchronously using FastAPI BackgroundTasks
         async def sync_task():
-            if search_query == "ALL_ENGINEERING":
-                logger.info("Starting mass sync via sync_engineering_jobs...")
-                await job_service.sync_engineering_jobs()
-            else:
-                await job_service.sync_jobs_from_adzuna(
-                    sync_type="manual",
-                    max_pages=max_pages,
-                    search_query=search_query,
-                    country=country
-                )
+            try:
+                if search_query == "ALL_ENGINEERING":
+                    logger.info("Starting mass sync via sync_engineering_jobs...")
+                    await job_service.sync_engineering_jobs(sync_log_id=sync_log_id)
+                else:
+                    await job_service.sync_jobs_from_adzuna(
+                        sync_type="manual",
+                        max_pages=max_pages,
+                        search_query=search_query,
+                        country=country,
+                        sync_log_id=sync_log_id
+                    )
+            finally:
+                await _release_sync_lock(db, lock_key, lock_owner)
         
         background_tasks.add_task(sync_task)
         
         return RefreshJobsResponse(
             message=f"Job refresh for '{search_query}' initiated successfully",
-            sync_id=0,  # Will be generated when task runs
+            sync_id=str(sync_log_id),
             status="in_progress"
         )
         
     except Exception as e:
+        await _release_sync_lock(db, lock_key, lock_owner)
         logger.error(f"Failed to trigger job refresh: {str(e)}")
         raise HTTPException(
             status_code=500,
@@ -66,7 +170,7 @@ async def refresh_jobs_manually(
 @router.post("/admin/refresh-jobs-multi-region", response_model=RefreshJobsResponse)
 async def refresh_jobs_multi_region_manually(
     background_tasks: BackgroundTasks,
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    job_service: JobService = Depends(get_job_service)
 ):
     """
     Manually trigger multi-region engineering job refresh.
@@ -75,14 +179,14 @@ async def refresh_jobs_multi_region_manually(
     try:
         logger.info("Multi-region manual job refresh triggered via API")
         
-        job_service = JobService(db)
+        sync_log_id = await job_service.create_sync_log("multi_region_engineering_sync")
         
         # Start sync asynchronously
-        background_tasks.add_task(job_service.sync_multi_region_engineering_jobs)
+        background_tasks.add_task(job_service.sync_multi_region_engineering_jobs, sync_log_id)
         
         return RefreshJobsResponse(
             message="Multi-region job refresh initiated successfully",
-            sync_id=0,
+            sync_id=str(sync_log_id),
             status="in_progress"
         )
         
@@ -95,10 +199,13 @@ async def refresh_jobs_multi_region_manually(
 
 
 @router.post("/admin/clear-cache")
-async def clear_cache(db: AsyncIOMotorDatabase = Depends(get_db)):
+async def clear_cache(db: AsyncDatabase = Depends(get_db)):
     """Clear all cached resume search results"""
     try:
         result = await db.resume_search_cache.delete_many({})
+        clear_match_cache()
+        clear_job_meta_cache()
+        _stats_cache.clear()
         return {
             "message": "Cache cleared successfully",
             "deleted_count": result.deleted_count
@@ -108,18 +215,31 @@ async def clear_cache(db: AsyncIOMotorDatabase = Depends(get_db)):
 
 
 @router.get("/admin/stats")
-async def get_stats(db: AsyncIOMotorDatabase = Depends(get_db)):
-    """Get database statistics"""
+async def get_stats(db: AsyncDatabase = Depends(get_db)):
+    """
+    Get database statistics
+    
+    Counts are cached for STATS_CACHE_TTL_SECONDS, so they may be up to 30s stale.
+    """
     try:
-        total_jobs = await db.jobs.count_documents({})
-        active_jobs = await db.jobs.count_documents({"status": "active"})
-        cache_entries = await db.resume_search_cache.count_documents({})
+        stats = _stats_cache.get("stats")
+        if stats is not None:
+            return stats
         
-        return {
+        # Unfiltered totals come from collection metadata; run all three together
+        total_jobs, active_jobs, cache_entries = await asyncio.gather(
+            db.jobs.estimated_document_count(),
+            db.jobs.count_documents({"status": "active"}),
+            db.resume_search_cache.estimated_document_count()
+        )
+        
+        stats = {
             "total_jobs": total_jobs,
             "active_jobs": active_jobs,
             "cached_searches": cache_entries
         }
+        _stats_cache["stats"] = stats
+        return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -127,107 +247,234 @@ async def get_stats(db: AsyncIOMotorDatabase = Depends(get_db)):
 @router.post("/admin/sync-to-cts")
 async def sync_all_jobs_to_cts(
     background_tasks: BackgroundTasks,
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db),
+    cts_client: CTSClient = Depends(get_cts_client),
+    job_service: JobService = Depends(get_job_service)
 ):
     """
     Sync all existing MongoDB jobs to Google Cloud Talent Solution
     
     This utility creates CTS entries for jobs that don't have them yet.
     Useful after enabling CTS permissions or migrating data.
+    Returns 409 if a CTS sync is already running.
     """
+    lock_key = "sync-to-cts"
+    lock_owner = await _acquire_sync_lock(db, lock_key)
+    if lock_owner is None:
+        raise HTTPException(status_code=409, detail="CTS sync already running")
+    
     try:
-        from app.integrations.cts import CTSClient
-        from datetime import datetime
-        
-        async def sync_task():
-            cts_client = CTSClient()
+        async def sync_task(total_to_sync: int):
             jobs_collection = db.jobs
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue(maxsize=CTS_SYNC_QUEUE_SIZE)
+            updates: asyncio.Queue = asyncio.Queue()
             
-            # Find jobs without CTS job name (not yet synced to CTS)
-            cursor = jobs_collection.find({
-                "$or": [
-                    {"cts_job_name": None},
-                    {"cts_job_name": {"$exists": False}}
-                ],
-                "status": "active"
-            })
-            
-            jobs_to_sync = await cursor.to_list(length=None)
-            total_jobs = len(jobs_to_sync)
-            
-            logger.info(f"Starting CTS sync for {total_jobs} jobs")
-            
-            success_count = 0
-            failed_count = 0
+            def to_cts_job_data(job) -> dict:
+                """Prepare job data for CTS"""
+                return {
+                    "adzuna_id": job["adzuna_id"],
+                    "title": job["title"],
+                    "description": job["description"],
+                    "company_display_name": job.get("company_display_name", "Unknown Company"),
+                    "location": job.get("location"),
+                    "location_structured": job.get("location_structured"),
+                    "employment_type": job.get("employment_type"),
+                    "job_level": job.get("job_level"),
+                    "salary_min": job.get("salary_min"),
+                    "salary_max": job.get("salary_max"),
+                    "category": job.get("category"),
+                    "redirect_url": job.get("redirect_url"),
+                    "is_internship": job.get("is_internship", False)
+                }
             
-            for job in jobs_to_sync:
+            async def sync_batch(batch: List[dict]) -> int:
+                """Create a batch of jobs in CTS; returns how many succeeded"""
                 try:
-                    # Prepare job data for CTS
-                    job_data = {
-                        "adzuna_id": job["adzuna_id"],
-                        "title": job["title"],
-                        "description": job["description"],
-                        "company_display_name": job.get("company_display_name", "Unknown Company"),
-                        "location": job.get("location"),
-                        "location_structured": job.get("location_structured"),
-                        "employment_type": job.get("employment_type"),
-                        "job_level": job.get("job_level"),
-                        "salary_min": job.get("salary_min"),
-                        "salary_max": job.get("salary_max"),
-                        "category": job.get("category"),
-                        "redirect_url": job.get("redirect_url"),
-                        "is_internship": job.get("is_internship", False)
-                    }
-                    
-                    # Create in CTS
-                    cts_job_name = cts_client.create_job(job_data)
-                    
-                    # Update MongoDB with CTS info
-                    await jobs_collection.update_one(
+                    # One batchCreate round-trip per batch (blocking Google client, keep it off the event loop)
+                    cts_job_names = await loop.run_in_executor(
+                        _cts_executor,
+                        cts_client.batch_create_jobs,
+                        [to_cts_job_data(job) for job in batch]
+                    )
+                except Exception as e:
+                    # Log full stack trace to expose AttributeError or other programming errors
+                    logger.exception(f"Failed to sync batch of {len(batch)} jobs to CTS: {str(e)}")
+                    return 0
+                
+                synced = 0
+                now = datetime.utcnow()
+                for job, cts_job_name in zip(batch, cts_job_names):
+                    if not cts_job_name:
+                        continue
+                    # Queue the MongoDB update; the flusher writes them in bulk
+                    await updates.put(UpdateOne(
                         {"_id": job["_id"]},
                         {
                             "$set": {
                                 "cts_job_name": cts_job_name,
-                                "last_synced_to_cts": datetime.utcnow()
+                                "last_synced_to_cts": now
                             }
                         }
-                    )
-                    
-                    success_count += 1
-                    
-                    if success_count % 10 == 0:
-                        logger.info(f"CTS sync progress: {success_count}/{total_jobs} jobs synced")
-                    
+                    ))
+                    synced += 1
+                return synced
+            
+            async def write_updates(ops: List[UpdateOne]):
+                try:
+                    await jobs_collection.bulk_write(ops, ordered=False)
                 except Exception as e:
-                    failed_count += 1
-                    # Log full stack trace to expose AttributeError or other programming errors
-                    logger.exception(f"Failed to sync job {job['adzuna_id']} to CTS: {str(e)}")
-                    continue
+                    logger.exception(f"Failed to record {len(ops)} CTS job names in MongoDB: {str(e)}")
+            
+            async def flusher():
+                ops: List[UpdateOne] = []
+                while True:
+                    op = await updates.get()
+                    if op is None:
+                        break
+                    ops.append(op)
+                    if len(ops) >= CTS_SYNC_WRITE_BATCH_SIZE:
+                        await write_updates(ops)
+                        ops = []
+                if ops:
+                    await write_updates(ops)
+            
+            progress = {"processed": 0}
+            
+            async def worker() -> Tuple[int, int]:
+                succeeded = failed = 0
+                while True:
+                    batch = await queue.get()
+                    if batch is None:
+                        return succeeded, failed
+                    synced = await sync_batch(batch)
+                    succeeded += synced
+                    failed += len(batch) - synced
+                    
+                    before = progress["processed"]
+                    progress["processed"] += len(batch)
+                    if progress["processed"] // CTS_SYNC_PROGRESS_LOG_INTERVAL > before // CTS_SYNC_PROGRESS_LOG_INTERVAL:
+                        logger.info(f"CTS sync progress: {progress['processed']}/{total_to_sync} jobs processed")
+            
+            flush_task = asyncio.create_task(flusher())
+            workers = [asyncio.create_task(worker()) for _ in range(CTS_SYNC_CONCURRENCY)]
+            
+            logger.info(f"Starting CTS sync for {total_to_sync} jobs")
+            
+            # Stream jobs without CTS job name (not yet synced to CTS) so memory
+            # stays bounded by the queue instead of the whole result set
+            cursor = jobs_collection.find(
+                CTS_UNSYNCED_FILTER,
+                projection=CTS_SYNC_PROJECTION
+            ).batch_size(200)
+            
+            counts: List[Tuple[int, int]] = []
+            try:
+                batch = []
+                async for job in cursor:
+                    batch.append(job)
+                    if len(batch) >= CTS_SYNC_BATCH_SIZE:
+                        await queue.put(batch)
+                        batch = []
+                if batch:
+                    await queue.put(batch)
+            finally:
+                try:
+                    # Even if the cursor failed part-way, workers finish the batches already
+                    # queued and the flusher records their CTS job names before returning
+                    for _ in workers:
+                        await queue.put(None)
+                    for result in await asyncio.gather(*workers, return_exceptions=True):
+                        if isinstance(result, Exception):
+                            logger.error(f"CTS sync worker failed: {str(result)}")
+                        else:
+                            counts.append(result)
+                    await updates.put(None)
+                    await flush_task
+                finally:
+                    # Only has an effect if the shutdown above was itself interrupted
+                    for task in (*workers, flush_task):
+                        task.cancel()
+            
+            success_count = sum(c[0] for c in counts)
+            failed_count = sum(c[1] for c in counts)
+            total_jobs = success_count + failed_count
             
             logger.info(f"CTS sync completed: {success_count} successful, {failed_count} failed out of {total_jobs} total")
+            return total_jobs, success_count, failed_count
         
-        background_tasks.add_task(sync_task)
+        async def tracked_sync_task(total_to_sync: int):
+            sync_logs = db.job_sync_logs
+            await sync_logs.update_one(
+                {"_id": sync_log_id},
+                {"$set": {"status": "in_progress", "jobs_fetched": total_to_sync}}
+            )
+            try:
+                total_jobs, success_count, failed_count = await sync_task(total_to_sync)
+                await sync_logs.update_one(
+                    {"_id": sync_log_id},
+                    {
+                        "$set": {
+                            "status": "completed",
+                            "jobs_fetched": total_jobs,
+                            "jobs_created": success_count,
+                            "jobs_failed": failed_count,
+                            "completed_at": datetime.utcnow()
+                        }
+                    }
+                )
+            except Exception as e:
+                logger.exception(f"CTS sync failed: {str(e)}")
+                await sync_logs.update_one(
+                    {"_id": sync_log_id},
+                    {
+                        "$set": {
+                            "status": "failed",
+                            "error_message": str(e),
+                            "completed_at": datetime.utcnow()
+                        }
+                    }
+                )
+            finally:
+                await _release_sync_lock(db, lock_key, lock_owner)
         
-        # Count jobs to sync
-        total_to_sync = await db.jobs.count_documents({
-            "$or": [
-                {"cts_job_name": None},
-                {"cts_job_name": {"$exists": False}}
-            ],
-            "status": "active"
-        })
+        # Count jobs to sync once; the task reuses it instead of re-running the filter
+        total_to_sync = await db.jobs.count_documents(CTS_UNSYNCED_FILTER)
+        
+        sync_log_id = await job_service.create_sync_log("cts_sync")
+        background_tasks.add_task(tracked_sync_task, total_to_sync)
         
         return {
             "message": "CTS sync initiated",
+            "sync_id": str(sync_log_id),
             "jobs_to_sync": total_to_sync,
             "status": "in_progress"
         }
         
     except Exception as e:
+        await _release_sync_lock(db, lock_key, lock_owner)
         logger.error(f"Failed to start CTS sync: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/admin/sync-status/{sync_id}", response_model=SyncStatusResponse)
+async def get_sync_status(sync_id: str, job_service: JobService = Depends(get_job_service)):
+    """
+    Get progress of a sync started via /admin/refresh-jobs,
+    /admin/refresh-jobs-multi-region or /admin/sync-to-cts
+    """
+    try:
+        sync_log = await job_service.get_sync_log(sync_id)
+    except Exception as e:
+        logger.error(f"Failed to fetch sync status: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if not sync_log:
+        raise HTTPException(status_code=404, detail="Sync not found")
+    
+    return SyncStatusResponse(sync_id=str(sync_log.pop("_id")), **sync_log)
+
+
 @router.post("/admin/trigger-emails")
 async def trigger_personalized_emails(
     email: Optional[str] = Query(None, description="Trigger for specific email only")
@@ -1,17 +1,85 @@
 from fastapi import APIRouter, Depends
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
+import asyncio
+import functools
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from app.database import get_db
 from app.schemas import HealthResponse
-from app.integrations.cts import CTSClient
+from app.integrations.cts import CTSClient, get_cts_client
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+# Seconds a health result is reused; LB probes hit this far more often than state changes
+HEALTH_CACHE_TTL_SECONDS = 10
+
+_hc_cache = {"ts": 0.0, "value": None}
+
+# Per-dependency timeout so a hung backend can't hold the probe past the LB interval
+HEALTH_CHECK_TIMEOUT_SECONDS = 2.0
+
+# The blocking CTS probe gets its own thread, so a hung CTS can't tie up the
+# default executor that matching and email sends use
+_cts_probe_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cts-health")
+
+_cts_probe: Optional[asyncio.Future] = None
+
+
+async def _check_database(db: AsyncDatabase) -> str:
+    """Ping MongoDB"""
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=HEALTH_CHECK_TIMEOUT_SECONDS)
+        return "healthy"
+    except asyncio.TimeoutError:
+        logger.error(f"MongoDB health check timed out after {HEALTH_CHECK_TIMEOUT_SECONDS}s")
+        return "unhealthy"
+    except Exception as e:
+        logger.error(f"MongoDB health check failed: {str(e)}")
+        return "unhealthy"
+
+
+async def _check_cts(cts_client: CTSClient) -> str:
+    """List CTS companies as a connection test (blocking client, run on the probe thread)"""
+    global _cts_probe
+    
+    # wait_for can't stop the blocking call, so never queue a second probe behind a hung one
+    if _cts_probe is not None and not _cts_probe.done():
+        logger.error("CTS health check skipped: previous probe still running")
+        return "unhealthy"
+    
+    try:
+        loop = asyncio.get_running_loop()
+        _cts_probe = loop.run_in_executor(
+            _cts_probe_executor,
+            functools.partial(
+                cts_client.list_companies,
+                use_cache=False,
+                timeout=HEALTH_CHECK_TIMEOUT_SECONDS
+            )
+        )
+        # Retrieve the result of a probe that outlives this request so it isn't logged as unhandled
+        _cts_probe.add_done_callback(lambda f: f.cancelled() or f.exception())
+        # shield keeps the future pending (and the in-flight check accurate) after a timeout
+        await asyncio.wait_for(asyncio.shield(_cts_probe), timeout=HEALTH_CHECK_TIMEOUT_SECONDS)
+        return "healthy"
+    except asyncio.TimeoutError:
+        logger.error(f"CTS health check timed out after {HEALTH_CHECK_TIMEOUT_SECONDS}s")
+        return "unhealthy"
+    except Exception as e:
+        logger.error(f"CTS health check failed: {str(e)}")
+        return "unhealthy"
+
+
 @router.get("/health", response_model=HealthResponse)
-async def health_check(db: AsyncIOMotorDatabase = Depends(get_db)):
+async def health_check(
+    db: AsyncDatabase = Depends(get_db),
+    cts_client: CTSClient = Depends(get_cts_client)
+):
     """
     Health check endpoint
     
@@ -19,34 +87,27 @@ async def health_check(db: AsyncIOMotorDatabase = Depends(get_db)):
     - API is running
     - MongoDB connection is healthy
     - CTS connection is available
+    
+    Results are cached for HEALTH_CACHE_TTL_SECONDS.
     """
-    # Check MongoDB
-    db_status = "healthy"
-    try:
-        await db.command("ping")
-    except Exception as e:
-        logger.error(f"MongoDB health check failed: {str(e)}")
-        db_status = "unhealthy"
+    if _hc_cache["value"] is not None and time.monotonic() - _hc_cache["ts"] < HEALTH_CACHE_TTL_SECONDS:
+        return _hc_cache["value"]
     
-    # Check CTS connection
-    cts_status = "healthy"
-    try:
-        cts_client = CTSClient()
-        # Try to list companies as a connection test
-        cts_client.list_companies()
-    except Exception as e:
-        logger.error(f"CTS health check failed: {str(e)}")
-        cts_status = "unhealthy"
+    db_status, cts_status = await asyncio.gather(_check_database(db), _check_cts(cts_client))
     
     # Overall status
     status = "healthy" if db_status == "healthy" and cts_status == "healthy" else "degraded"
     
-    return HealthResponse(
+    response = HealthResponse(
         status=status,
         timestamp=datetime.utcnow(),
         database=db_status,
         cts_connection=cts_status
     )
+    
+    _hc_cache["ts"] = time.monotonic()
+    _hc_cache["value"] = response
+    return response
 
 
 @router.get("/")
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
+import os
+import re
 import time
+import uuid
 import logging
-from app.database import get_db
 from app.schemas import (
     ResumeMatchRequest, 
     JobDescriptionMatchRequest,
-    JobMatchResponse,
     MatchResultResponse,
     JobListResponse,
     JobLevel,
@@ -16,13 +17,36 @@ from app.schemas import (
     EmailSubscriptionRequest,
     SubscriptionInfo
 )
-from app.services.matching_service_mongo import MatchingService
-from app.services.job_service_mongo import JobService
+from app.services.matching_service_mongo import MatchingService, get_matching_service
+from app.services.job_service_mongo import JobService, get_job_service, SUBSCRIPTION_INFO_PROJECTION
 from app.utils.resume_parser import ResumeParser
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def _internal_error(message: str) -> HTTPException:
+    """
+    Log the active exception with a short error ID and build a 500 that
+    returns only the message and that ID (call from an except block)
+    """
+    error_id = uuid.uuid4().hex[:12]
+    logger.exception(f"{message} [error_id={error_id}]")
+    return HTTPException(status_code=500, detail=f"{message}. Error ID: {error_id}")
+
+
+def _job_list_response(jobs: List[dict], total: int) -> ORJSONResponse:
+    """
+    Encode a JobListResponse payload straight from rows shaped by
+    JOB_SUMMARY_PROJECTION (already truncated and defaulted in MongoDB),
+    skipping Pydantic model building and response_model validation
+    """
+    for job in jobs:
+        job["relevance_score"] = 0.0  # No scoring for listed jobs
+    return ORJSONResponse({"total": total, "jobs": jobs})
+
 
 @router.post("/match/resume/upload", response_model=MatchResultResponse)
 async def match_resume_by_upload(
@@ -31,7 +55,7 @@ async def match_resume_by_upload(
     internship_only: Optional[bool] = Query(False, description="Filter for internships only"),
     job_level: Optional[JobLevel] = Query(None, description="Preferred job level"),
     stipend_min: Optional[float] = Query(None, ge=0, description="Minimum salary/stipend"),
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    matching_service: MatchingService = Depends(get_matching_service)
 ):
     """
     Match jobs based on an uploaded resume file
@@ -54,25 +78,25 @@ async def match_resume_by_upload(
     - Search metadata and timing information
     """
     try:
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
+        
+        job_level_value = job_level.value if job_level else None
         
         # Parse resume from uploaded file
         logger.info(f"Processing resume upload: {file.filename}")
         resume_text = await ResumeParser.parse_resume(file)
         
         # Use matching service to find jobs
-        matching_service = MatchingService(db)
-        
         matched_jobs = await matching_service.match_resume_to_jobs(
             resume_text=resume_text,
             location=location,
             internship_only=internship_only,
-            job_level=job_level.value if job_level else None,
+            job_level=job_level_value,
             stipend_min=stipend_min,
             max_results=50
         )
         
-        search_time_ms = (time.time() - start_time) * 1000
+        search_time_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         
         logger.info(
             f"Resume file match completed: {file.filename} -> {len(matched_jobs)} results in {search_time_ms:.2f}ms"
@@ -87,22 +111,21 @@ async def match_resume_by_upload(
                 "file_type": file.content_type,
                 "location": location,
                 "internship_only": internship_only,
-                "job_level": job_level.value if job_level else None,
+                "job_level": job_level_value,
                 "stipend_min": stipend_min
             }
         )
         
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Resume file matching failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Matching failed: {str(e)}")
+    except Exception:
+        raise _internal_error("Resume file matching failed")
 
 
 @router.post("/match/resume", response_model=MatchResultResponse)
 async def match_resume(
     request: ResumeMatchRequest,
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    matching_service: MatchingService = Depends(get_matching_service)
 ):
     """
     Match a resume to relevant jobs using Google Cloud Talent Solution
@@ -116,21 +139,20 @@ async def match_resume(
     Returns ranked jobs with CTS relevance scores
     """
     try:
-        start_time = time.time()
-        
-        matching_service = MatchingService(db)
+        start_ns = time.perf_counter_ns()
+        job_level_value = request.job_level.value if request.job_level else None
         
         # Perform matching
         matched_jobs = await matching_service.match_resume_to_jobs(
             resume_text=request.resume_text,
             location=request.location,
             internship_only=request.internship_only,
-            job_level=request.job_level.value if request.job_level else None,
+            job_level=job_level_value,
             stipend_min=request.stipend_min,
             max_results=50
         )
         
-        search_time_ms = (time.time() - start_time) * 1000
+        search_time_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         
         logger.info(
             f"Resume match completed: {len(matched_jobs)} results in {search_time_ms:.2f}ms"
@@ -143,19 +165,18 @@ async def match_resume(
             metadata={
                 "location": request.location,
                 "internship_only": request.internship_only,
-                "job_level": request.job_level.value if request.job_level else None
+                "job_level": job_level_value
             }
         )
         
-    except Exception as e:
-        logger.error(f"Resume matching failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Matching failed: {str(e)}")
+    except Exception:
+        raise _internal_error("Resume matching failed")
 
 
 @router.post("/match/jd", response_model=MatchResultResponse)
 async def match_job_description(
     request: JobDescriptionMatchRequest,
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    matching_service: MatchingService = Depends(get_matching_service)
 ):
     """
     Find similar jobs based on a job description
@@ -167,19 +188,18 @@ async def match_job_description(
     Returns similar jobs from the database
     """
     try:
-        start_time = time.time()
-        
-        matching_service = MatchingService(db)
+        start_ns = time.perf_counter_ns()
+        job_type_value = request.job_type.value if request.job_type else None
         
         # Perform matching
         matched_jobs = await matching_service.match_jd_to_jobs(
             job_description=request.job_description,
             location=request.location,
-            job_type=request.job_type.value if request.job_type else None,
+            job_type=job_type_value,
             max_results=50
         )
         
-        search_time_ms = (time.time() - start_time) * 1000
+        search_time_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         
         logger.info(
             f"JD match completed: {len(matched_jobs)} results in {search_time_ms:.2f}ms"
@@ -191,26 +211,25 @@ async def match_job_description(
             jobs=matched_jobs,
             metadata={
                 "location": request.location,
-                "job_type": request.job_type.value if request.job_type else None
+                "job_type": job_type_value
             }
         )
         
-    except Exception as e:
-        logger.error(f"JD matching failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Matching failed: {str(e)}")
+    except Exception:
+        raise _internal_error("JD matching failed")
 
 
 @router.get("/jobs", response_model=JobListResponse)
 async def get_jobs(
-    min_stipend: float = None,
-    max_stipend: float = None,
-    remote: bool = None,
-    internship: bool = None,
-    location: str = None,
-    country: str = None,
-    skip: int = 0,
-    limit: int = 50,
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    min_stipend: Optional[float] = Query(None, ge=0),
+    max_stipend: Optional[float] = Query(None, ge=0),
+    remote: Optional[bool] = Query(None),
+    internship: Optional[bool] = Query(None),
+    location: Optional[str] = Query(None),
+    country: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    job_service: JobService = Depends(get_job_service)
 ):
     """
     Get jobs with optional filters
@@ -226,8 +245,6 @@ async def get_jobs(
     - **limit**: Results per page (max 100)
     """
     try:
-        job_service = JobService(db)
-        
         jobs, total = await job_service.get_jobs_with_filters(
             min_stipend=min_stipend,
             max_stipend=max_stipend,
@@ -236,48 +253,22 @@ async def get_jobs(
             location=location,
             country=country,
             skip=skip,
-            limit=min(limit, 100)
+            limit=limit
         )
         
-        # Convert to response format
-        job_responses = []
-        for job in jobs:
-            description = job.get("description", "")
-            truncated_desc = description[:500] + "..." if len(description) > 500 else description
-            
-            job_response = JobMatchResponse(
-                job_id=str(job["_id"]),
-                adzuna_id=job["adzuna_id"],
-                title=job["title"],
-                company=job.get("company_display_name") or "Unknown",
-                location=job.get("location"),
-                employment_type=job.get("employment_type"),
-                salary_min=job.get("salary_min"),
-                salary_max=job.get("salary_max"),
-                description=truncated_desc,
-                redirect_url=job.get("redirect_url"),
-                relevance_score=0.0,  # No scoring for filtered results
-                is_internship=job.get("is_internship", False)
-            )
-            job_responses.append(job_response)
-        
-        logger.info(f"Jobs query: returned {len(job_responses)} of {total} total")
+        logger.info(f"Jobs query: returned {len(jobs)} of {total} total")
         
-        return JobListResponse(
-            total=total,
-            jobs=job_responses
-        )
+        return _job_list_response(jobs, total)
         
-    except Exception as e:
-        logger.error(f"Job listing failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to fetch jobs: {str(e)}")
+    except Exception:
+        raise _internal_error("Job listing failed")
 
 
 @router.post("/{job_id}/favorite", response_model=UserJobInteractionResponse)
 async def toggle_favorite(
     job_id: str,
     request: UserJobInteractionRequest,
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    job_service: JobService = Depends(get_job_service)
 ):
     """
     Toggle favorite status for a job
@@ -286,7 +277,6 @@ async def toggle_favorite(
     - **user_id**: ID of the user (passed in request body)
     """
     try:
-        job_service = JobService(db)
         is_favorite = await job_service.toggle_favorite(request.user_id, job_id)
         
         status = "added" if is_favorite else "removed"
@@ -295,55 +285,28 @@ async def toggle_favorite(
             status="success",
             is_active=is_favorite
         )
-    except Exception as e:
-        logger.error(f"Toggle favorite failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise _internal_error("Toggle favorite failed")
 
 
 @router.get("/favorites", response_model=JobListResponse)
 async def get_favorites(
     user_id: str = Query(..., description="User ID to fetch favorites for"),
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    job_service: JobService = Depends(get_job_service)
 ):
     """Get all favorite jobs for a user"""
     try:
-        job_service = JobService(db)
         jobs = await job_service.get_user_favorites(user_id)
-        
-        job_responses = []
-        for job in jobs:
-            description = job.get("description", "")
-            truncated_desc = description[:500] + "..." if len(description) > 500 else description
-            
-            job_responses.append(JobMatchResponse(
-                job_id=str(job["_id"]),
-                adzuna_id=job["adzuna_id"],
-                title=job["title"],
-                company=job.get("company_display_name") or "Unknown",
-                location=job.get("location"),
-                employment_type=job.get("employment_type"),
-                salary_min=job.get("salary_min"),
-                salary_max=job.get("salary_max"),
-                description=truncated_desc,
-                redirect_url=job.get("redirect_url"),
-                relevance_score=0.0,
-                is_internship=job.get("is_internship", False)
-            ) )
-            
-        return JobListResponse(
-            total=len(job_responses),
-            jobs=job_responses
-        )
-    except Exception as e:
-        logger.error(f"Get favorites failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        return _job_list_response(jobs, len(jobs))
+    except Exception:
+        raise _internal_error("Get favorites failed")
 
 
 @router.post("/{job_id}/bookmark", response_model=UserJobInteractionResponse)
 async def toggle_bookmark(
     job_id: str,
     request: UserJobInteractionRequest,
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    job_service: JobService = Depends(get_job_service)
 ):
     """
     Toggle bookmark status for a job
@@ -352,7 +315,6 @@ async def toggle_bookmark(
     - **user_id**: ID of the user (passed in request body)
     """
     try:
-        job_service = JobService(db)
         is_bookmarked = await job_service.toggle_bookmark(request.user_id, job_id)
         
         status = "added" if is_bookmarked else "removed"
@@ -361,48 +323,21 @@ async def toggle_bookmark(
             status="success",
             is_active=is_bookmarked
         )
-    except Exception as e:
-        logger.error(f"Toggle bookmark failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise _internal_error("Toggle bookmark failed")
 
 
 @router.get("/bookmarks", response_model=JobListResponse)
 async def get_bookmarks(
     user_id: str = Query(..., description="User ID to fetch bookmarks for"),
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    job_service: JobService = Depends(get_job_service)
 ):
     """Get all bookmarked jobs for a user"""
     try:
-        job_service = JobService(db)
         jobs = await job_service.get_user_bookmarks(user_id)
-        
-        job_responses = []
-        for job in jobs:
-            description = job.get("description", "")
-            truncated_desc = description[:500] + "..." if len(description) > 500 else description
-            
-            job_responses.append(JobMatchResponse(
-                job_id=str(job["_id"]),
-                adzuna_id=job["adzuna_id"],
-                title=job["title"],
-                company=job.get("company_display_name") or "Unknown",
-                location=job.get("location"),
-                employment_type=job.get("employment_type"),
-                salary_min=job.get("salary_min"),
-                salary_max=job.get("salary_max"),
-                description=truncated_desc,
-                redirect_url=job.get("redirect_url"),
-                relevance_score=0.0,
-                is_internship=job.get("is_internship", False)
-            ) )
-            
-        return JobListResponse(
-            total=len(job_responses),
-            jobs=job_responses
-        )
-    except Exception as e:
-        logger.error(f"Get bookmarks failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        return _job_list_response(jobs, len(jobs))
+    except Exception:
+        raise _internal_error("Get bookmarks failed")
 
 
 @router.post("/subscribe", response_model=UserJobInteractionResponse)
@@ -415,7 +350,7 @@ async def subscribe_email(
     internship_only: bool = Query(False, description="Filter for internships only"),
     job_level: Optional[str] = Query(None, description="Job level: ENTRY_LEVEL, MID_LEVEL, SENIOR_LEVEL, EXECUTIVE"),
     stipend_min: Optional[float] = Query(None, description="Minimum salary/stipend"),
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    job_service: JobService = Depends(get_job_service)
 ):
     """
     Subscribe for email notifications with resume file upload
@@ -434,16 +369,15 @@ async def subscribe_email(
     """
     try:
         # Validate email
-        if "@" not in email or "." not in email:
+        if not EMAIL_PATTERN.match(email.strip()):
             raise HTTPException(status_code=400, detail="Invalid email address")
         
         # Validate file type
-        allowed_extensions = ['.pdf', '.docx', '.txt']
-        file_ext = file.filename.lower()[file.filename.rfind('.'):]
-        if file_ext not in allowed_extensions:
+        file_ext = os.path.splitext(file.filename or "")[1].lower()
+        if file_ext not in ResumeParser.ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
+                detail=f"Invalid file type. Allowed: {', '.join(sorted(ResumeParser.ALLOWED_EXTENSIONS))}"
             )
         
         # Parse resume file
@@ -456,7 +390,6 @@ async def subscribe_email(
             raise HTTPException(status_code=400, detail=f"Failed to parse resume: {str(e)}")
         
         # Subscribe with parsed resume
-        job_service = JobService(db)
         is_new = await job_service.subscribe_email(
             email=email.strip().lower(),
             resume_text=resume_text,
@@ -482,36 +415,32 @@ async def subscribe_email(
             )
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Error subscribing email: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise _internal_error("Subscription failed")
 
 
 @router.get("/subscriptions", response_model=List[SubscriptionInfo])
 async def get_all_subscriptions(
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    job_service: JobService = Depends(get_job_service)
 ):
     """
     Get all active email subscriptions (Admin only)
     """
     try:
-        job_service = JobService(db)
-        return await job_service.get_all_subscriptions()
-    except Exception as e:
-        logger.error(f"Get subscriptions failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        return await job_service.get_all_subscriptions(projection=SUBSCRIPTION_INFO_PROJECTION)
+    except Exception:
+        raise _internal_error("Get subscriptions failed")
 
 
 @router.delete("/subscribe", response_model=UserJobInteractionResponse)
 async def unsubscribe_email(
     email: str = Query(..., description="Email address to unsubscribe"),
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    job_service: JobService = Depends(get_job_service)
 ):
     """
     Unsubscribe from email notifications
     """
     try:
-        job_service = JobService(db)
         deleted = await job_service.unsubscribe_email(email)
         
         if deleted:
@@ -524,6 +453,5 @@ async def unsubscribe_email(
             raise HTTPException(status_code=404, detail="Email not found")
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"Unsubscribe failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise _internal_error("Unsubscribe failed")
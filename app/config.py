@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from functools import lru_cache
+from functools import lru_cache, cached_property
 from typing import List
 
 
@@ -28,6 +28,8 @@ class Settings(BaseSettings):
     # MongoDB Database
     MONGODB_URL: str
     MONGODB_DB_NAME: str = "jobmatch_db"
+    MONGODB_MAX_POOL_SIZE: int = 50  # API requests and the sync jobs share this pool
+    MONGODB_MIN_POOL_SIZE: int = 10
     
     # Job Refresh
     JOB_REFRESH_TIME: str = "03:00"
@@ -41,6 +43,7 @@ class Settings(BaseSettings):
     API_PORT: int = 8000
     DEBUG: bool = False
     LOG_LEVEL: str = "INFO"
+    CORS_ORIGINS: str = "*"  # Comma-separated; list the frontend origins in production
     
     # AWS SES Settings
     AWS_SES_ACCESS_KEY_ID: str = ""
@@ -48,18 +51,23 @@ class Settings(BaseSettings):
     AWS_SES_FROM_EMAIL: str = "noreply@aiforjob.ai"
     AWS_SES_REGION: str = "us-east-1"
     
-    @property
+    # Derived values are computed on first access; settings never change at runtime
+    @cached_property
     def parent_path(self) -> str:
         """Full parent path for CTS (uses DEFAULT tenant)"""
         return f"projects/{self.GCP_PROJECT_ID}"
     
-    @property
+    @cached_property
     def job_levels_list(self) -> List[str]:
         return [level.strip() for level in self.CTS_JOB_LEVEL.split(",")]
     
-    @property
+    @cached_property
     def employment_types_list(self) -> List[str]:
         return [emp.strip() for emp in self.CTS_EMPLOYMENT_TYPE.split(",")]
+    
+    @cached_property
+    def cors_origins_list(self) -> List[str]:
+        return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
 
 
 @lru_cache()
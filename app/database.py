@@ -1,6 +1,7 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ASCENDING, DESCENDING
+from pymongo import AsyncMongoClient, IndexModel, ASCENDING, DESCENDING
+from pymongo.asynchronous.database import AsyncDatabase
 from typing import Optional
+import asyncio
 import logging
 from app.config import get_settings
 
@@ -8,11 +9,11 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 # Global MongoDB client
-mongodb_client: Optional[AsyncIOMotorClient] = None
+mongodb_client: Optional[AsyncMongoClient] = None
 
 
-async def get_database():
-    """Get MongoDB database instance"""
+def get_database() -> AsyncDatabase:
+    """Get MongoDB database instance (a cheap handle; no I/O)"""
     return mongodb_client[settings.MONGODB_DB_NAME]
 
 
@@ -20,10 +21,11 @@ async def connect_to_mongo():
     """Create MongoDB connection"""
     global mongodb_client
     try:
-        mongodb_client = AsyncIOMotorClient(
+        mongodb_client = AsyncMongoClient(
             settings.MONGODB_URL,
-            maxPoolSize=10,
-            minPoolSize=2,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+            retryWrites=True,
             serverSelectionTimeoutMS=5000
         )
         # Test connection
@@ -42,70 +44,116 @@ async def close_mongo_connection():
     """Close MongoDB connection"""
     global mongodb_client
     if mongodb_client:
-        mongodb_client.close()
+        await mongodb_client.close()
         logger.info("Closed MongoDB connection")
 
 
 async def create_indexes():
     """Create database indexes for performance"""
     try:
-        db = await get_database()
+        db = get_database()
         
-        # Jobs collection indexes
-        jobs_collection = db.jobs
-        await jobs_collection.create_index("adzuna_id", unique=True)
-        await jobs_collection.create_index("requisition_id", unique=True)
-        await jobs_collection.create_index("status")
-        await jobs_collection.create_index("expires_at")
-        await jobs_collection.create_index([("location", ASCENDING), ("status", ASCENDING)])
-        await jobs_collection.create_index([("is_internship", ASCENDING), ("status", ASCENDING)])
-        await jobs_collection.create_index("created_at")
-        # Text index for resume matching fallback
-        await jobs_collection.create_index([
-            ("title", "text"),
-            ("description", "text"),
-            ("company_display_name", "text")
-        ], name="job_text_search")
+        job_index_info = await db.jobs.index_information()
         
-        # Companies collection indexes
-        companies_collection = db.companies
-        await companies_collection.create_index("cts_company_name", unique=True)
-        await companies_collection.create_index("external_id", unique=True)
+        # job_text_search no longer covers description; an existing index with the
+        # old keys has to go before it can be rebuilt under the same name
+        if "description" in job_index_info.get("job_text_search", {}).get("weights", {}):
+            await db.jobs.drop_index("job_text_search")
         
-        # Sync logs collection indexes
-        sync_logs_collection = db.job_sync_logs
-        await sync_logs_collection.create_index([("status", ASCENDING), ("started_at", DESCENDING)])
+        # One createIndexes command per collection
+        collection_indexes = {
+            "jobs": [
+                IndexModel("adzuna_id", unique=True),
+                IndexModel("requisition_id", unique=True),
+                IndexModel("status"),
+                IndexModel("expires_at"),
+                IndexModel([("location", ASCENDING), ("status", ASCENDING)]),
+                IndexModel([("is_internship", ASCENDING), ("status", ASCENDING)]),
+                # /jobs/locations distinct over active jobs
+                IndexModel([("status", ASCENDING), ("location_structured.country", ASCENDING)]),
+                # CTS backlog scan in /admin/sync-to-cts; only unsynced jobs are indexed
+                IndexModel(
+                    [("status", ASCENDING), ("cts_job_name", ASCENDING)],
+                    name="cts_unsynced",
+                    partialFilterExpression={"cts_job_name": None}
+                ),
+                # /jobs internship + stipend filters
+                IndexModel([
+                    ("status", ASCENDING),
+                    ("is_internship", ASCENDING),
+                    ("salary_min", ASCENDING)
+                ]),
+                IndexModel("created_at"),
+                # /jobs listing: equality filters first, then the created_at sort, so the
+                # page is read in index order instead of sorted in memory
+                IndexModel([("status", ASCENDING), ("created_at", DESCENDING)]),
+                IndexModel([
+                    ("status", ASCENDING),
+                    ("is_internship", ASCENDING),
+                    ("created_at", DESCENDING)
+                ]),
+                # Text index for resume matching fallback. Descriptions are left out:
+                # indexing them made the index larger than the data and slowed every upsert
+                IndexModel(
+                    [("title", "text"), ("company_display_name", "text")],
+                    weights={"title": 10, "company_display_name": 5},
+                    name="job_text_search"
+                )
+            ],
+            "companies": [
+                IndexModel("cts_company_name", unique=True),
+                IndexModel("external_id", unique=True)
+            ],
+            "job_sync_logs": [
+                IndexModel([("status", ASCENDING), ("started_at", DESCENDING)])
+            ],
+            "resume_search_cache": [
+                IndexModel("resume_hash"),
+                IndexModel("expires_at"),
+                IndexModel([("resume_hash", ASCENDING), ("expires_at", ASCENDING)])
+            ],
+            "favorites": [
+                IndexModel([("user_id", ASCENDING), ("job_id", ASCENDING)], unique=True),
+                IndexModel("user_id")
+            ],
+            "bookmarks": [
+                IndexModel([("user_id", ASCENDING), ("job_id", ASCENDING)], unique=True),
+                IndexModel("user_id")
+            ],
+            # Sync locks expire on their own if a sync task dies without releasing them
+            "sync_locks": [
+                IndexModel("expires_at", expireAfterSeconds=0)
+            ],
+            "email_subscriptions": [
+                IndexModel("email", unique=True),
+                # Scheduled email runs select enabled subscriptions by frequency
+                IndexModel([("is_enabled", ASCENDING), ("frequency", ASCENDING)])
+            ]
+        }
         
-        # Cache collection indexes
-        cache_collection = db.resume_search_cache
-        await cache_collection.create_index("resume_hash")
-        await cache_collection.create_index("expires_at")
-        await cache_collection.create_index([("resume_hash", ASCENDING), ("expires_at", ASCENDING)])
+        # Collections are independent, so their index builds run concurrently;
+        # a conflict on one collection doesn't stop the others from being indexed
+        results = await asyncio.gather(*(
+            db[name].create_indexes(indexes)
+            for name, indexes in collection_indexes.items()
+        ), return_exceptions=True)
         
-        # Favorites collection indexes
-        favorites_collection = db.favorites
-        await favorites_collection.create_index([("user_id", ASCENDING), ("job_id", ASCENDING)], unique=True)
-        await favorites_collection.create_index("user_id")
+        failed = 0
+        for name, result in zip(collection_indexes, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to create indexes on {name}: {str(result)}")
+                failed += 1
         
-        # Bookmarks collection indexes
-        bookmarks_collection = db.bookmarks
-        await bookmarks_collection.create_index([("user_id", ASCENDING), ("job_id", ASCENDING)], unique=True)
-        await bookmarks_collection.create_index("user_id")
-        
-        # Email subscriptions collection indexes
-        email_subs_collection = db.email_subscriptions
-        await email_subs_collection.create_index("email", unique=True)
-        
-        logger.info("Database indexes created successfully")
+        if not failed:
+            logger.info("Database indexes created successfully")
         
     except Exception as e:
         logger.error(f"Failed to create indexes: {str(e)}")
 
 
-async def get_db():
-    """Dependency for FastAPI routes"""
-    db = await get_database()
-    try:
-        yield db
-    finally:
-        pass  # Connection pooling handles cleanup
+async def get_db() -> AsyncDatabase:
+    """
+    Dependency for FastAPI routes (connection pooling handles cleanup).
+    Declared async so FastAPI calls it on the event loop instead of a threadpool.
+    """
+    return get_database()
@@ -1,7 +1,11 @@
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
+import asyncio
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import math
+import re
+import orjson
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception, RetryCallState
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -10,7 +14,68 @@ settings = get_settings()
 
 class AdzunaAPIError(Exception):
     """Custom exception for Adzuna API errors"""
-    pass
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+# Statuses worth retrying: rate limiting and server-side failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry network failures and 429/5xx responses, not other client errors"""
+    if isinstance(exc, AdzunaAPIError):
+        return exc.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+# Longest Retry-After we are willing to sleep for inside a sync
+MAX_RETRY_AFTER_SECONDS = 60.0
+
+_backoff_wait = wait_exponential_jitter(initial=1, max=15, jitter=4)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After in seconds; the HTTP-date form is ignored"""
+    try:
+        return min(max(float(value), 0.0), MAX_RETRY_AFTER_SECONDS) if value else None
+    except ValueError:
+        return None
+
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    """Jittered exponential backoff, stretched to any Retry-After the API sent"""
+    wait = _backoff_wait(retry_state)
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(exc, AdzunaAPIError) and exc.retry_after is not None:
+        wait = max(wait, exc.retry_after)
+    return wait
+
+
+# Keywords for parse_job_data, matched as whole words (substring matching
+# also hit words like "international" or "mvp"). All categories are compiled
+# into one alternation so each text is classified in a single regex pass.
+_JOB_KEYWORDS = {
+    "intern": ("intern", "interns", "internship", "internships", "coop", "co-op"),
+    "entry": ("entry", "junior"),
+    "senior": ("senior", "lead", "principal"),
+    "executive": ("director", "vp", "chief", "head of"),
+    "remote": ("remote", "wfh", "telecommute", "telecommuting", "work from home")
+}
+_JOB_KEYWORD_RE = re.compile(
+    r"\b(?:" + "|".join(
+        f"(?P<{category}>" + "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + ")"
+        for category, keywords in _JOB_KEYWORDS.items()
+    ) + r")\b"
+)
+
+
+def _keyword_categories(text: str) -> set:
+    """Categories from _JOB_KEYWORDS found in already lower-cased text"""
+    return {match.lastgroup for match in _JOB_KEYWORD_RE.finditer(text)}
 
 
 class AdzunaClient:
@@ -18,12 +83,32 @@ class AdzunaClient:
     
     BASE_URL = "https://api.adzuna.com/v1/api"
     
+    # Page requests in flight at once during iter_job_pages (Adzuna rate limits)
+    MAX_CONCURRENT_PAGES = 5
+    
     def __init__(self):
         self.app_id = settings.ADZUNA_APP_ID
         self.app_key = settings.ADZUNA_APP_KEY
         self.country = settings.ADZUNA_COUNTRY
         self.results_per_page = settings.ADZUNA_RESULTS_PER_PAGE
         self.timeout = httpx.Timeout(30.0, connect=10.0)
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={"User-Agent": "Mozilla/5.0 (compatible; JobMatchBot/1.0)"},
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=20)
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     def _build_url(self, endpoint: str, country: Optional[str] = None) -> str:
         """Build full API URL"""
@@ -31,9 +116,11 @@ class AdzunaClient:
         return f"{self.BASE_URL}/jobs/{target_country}/{endpoint}"
     
     @retry(
-        stop=stop_after_attempt(2),
-        wait=wait_exponential(multiplier=1, min=4, max=15),
-        retry=retry_if_exception_type((httpx.HTTPError, httpx.TimeoutException))
+        stop=stop_after_attempt(3),
+        # Jitter spreads out retries from concurrent page fetches
+        wait=_retry_wait,
+        retry=retry_if_exception(_is_retryable),
+        reraise=True
     )
     async def _make_request(
         self, 
@@ -54,25 +141,26 @@ class AdzunaClient:
         if params:
             request_params.update(params)
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (compatible; JobMatchBot/1.0)"
-        }
-        
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                # Log the actual URL being called for debugging
-                logger.info(f"Calling Adzuna API: {url} with params: {request_params}")
-                response = await client.get(url, params=request_params, headers=headers)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Adzuna API error: {e.response.status_code}")
-                logger.error(f"Request URL: {e.request.url}")
-                logger.error(f"Response: {e.response.text[:500]}")
-                raise AdzunaAPIError(f"API returned {e.response.status_code}")
-            except Exception as e:
-                logger.error(f"Adzuna request failed: {str(e)}")
-                raise
+        # Reuse pooled keep-alive connections instead of a new TLS handshake per page
+        client = self._get_client()
+        try:
+            # Log the actual URL being called for debugging
+            logger.info(f"Calling Adzuna API: {url} with params: {request_params}")
+            response = await client.get(url, params=request_params)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Adzuna API error: {e.response.status_code}")
+            logger.error(f"Request URL: {e.request.url}")
+            logger.error(f"Response: {e.response.text[:500]}")
+            raise AdzunaAPIError(
+                f"API returned {e.response.status_code}",
+                status_code=e.response.status_code,
+                retry_after=_parse_retry_after(e.response.headers.get("Retry-After"))
+            )
+        except Exception as e:
+            logger.error(f"Adzuna request failed: {str(e)}")
+            raise
     
     async def search_jobs(
         self,
@@ -98,6 +186,66 @@ class AdzunaClient:
         logger.info(f"Searching Adzuna ({country or self.country}): page={page}, what={what}")
         return await self._make_request(endpoint, params, country=country)
     
+    async def iter_job_pages(
+        self,
+        max_pages: int = 5,
+        what: Optional[str] = None,
+        country: Optional[str] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Fetch jobs up to max_pages, yielding each page's results as it arrives
+        
+        Page 1 is fetched first to learn how many pages exist; the remaining
+        pages are fetched concurrently and yielded in completion order, so the
+        caller can persist one page while the others are still downloading.
+        Failed pages are logged and skipped.
+        """
+        logger.info(f"Starting job fetch (max {max_pages} pages, {self.results_per_page} per page, what='{what}')")
+        
+        # Page 1 tells us how many results exist
+        try:
+            first = await self.search_jobs(page=1, what=what, country=country)
+        except Exception as e:
+            logger.error(f"Failed to fetch page 1: {str(e)}")
+            return
+        
+        first_results = first.get("results", [])
+        if not first_results:
+            logger.info("No jobs found at page 1")
+            return
+        
+        count = first.get("count", 0)
+        needed_pages = min(max_pages, math.ceil(count / self.results_per_page))
+        if len(first_results) < self.results_per_page:
+            # A short first page is the whole result set, whatever count claims
+            needed_pages = 1
+        logger.info(f"Fetched page 1/{needed_pages}: {len(first_results)} jobs (total available: {count})")
+        
+        # Remaining pages are independent; fetch them concurrently within the rate limit
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_PAGES)
+        
+        async def fetch_page(page: int) -> List[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    result = await self.search_jobs(page=page, what=what, country=country)
+                except Exception as e:
+                    # Keep whatever the other pages return instead of failing the sync
+                    logger.error(f"Failed to fetch page {page}: {str(e)}")
+                    return []
+                return result.get("results", [])
+        
+        tasks = [asyncio.create_task(fetch_page(p)) for p in range(2, needed_pages + 1)]
+        try:
+            yield first_results
+            for next_page in asyncio.as_completed(tasks):
+                results = await next_page
+                if results:
+                    yield results
+        finally:
+            # Consumer stopped early; don't leave page requests running
+            for task in tasks:
+                task.cancel()
+    
     async def fetch_all_jobs(
         self,
         max_pages: int = 5,  # Reduced from 20 to limit API calls
@@ -108,50 +256,15 @@ class AdzunaClient:
         Fetch all available jobs up to max_pages (limited to avoid rate limits)
         Only using minimal params: app_id, app_key, results_per_page, what
 
-        Filtering will be done after data retrieval
+        Filtering will be done after data retrieval. Prefer iter_job_pages
+        when the jobs can be processed page by page.
         
         Returns:
             List of job dictionaries
         """
         all_jobs = []
-        page = 1
-        
-        logger.info(f"Starting job fetch (max {max_pages} pages, {self.results_per_page} per page, what='{what}')")
-        
-        while page <= max_pages:
-            try:
-                result = await self.search_jobs(page=page, what=what, country=country)
-                
-                jobs = result.get("results", [])
-                if not jobs:
-                    logger.info(f"No more jobs found at page {page}")
-                    break
-                
-                all_jobs.extend(jobs)
-                
-                # Check if we've reached the end
-                count = result.get("count", 0)
-                total_fetched = page * self.results_per_page
-                
-                logger.info(f"Fetched page {page}/{max_pages}: {len(jobs)} jobs (total: {len(all_jobs)}/{count})")
-                
-                if total_fetched >= count:
-                    logger.info(f"Reached end of results (total available: {count})")
-                    break
-                
-                page += 1
-                
-            except AdzunaAPIError as e:
-                logger.error(f"Failed to fetch page {page}: {str(e)}")
-                # If we already have some jobs, return them instead of failing completely
-                if all_jobs:
-                    logger.info(f"Returning {len(all_jobs)} jobs fetched before error")
-                break
-            except Exception as e:
-                logger.error(f"Unexpected error on page {page}: {str(e)}")
-                if all_jobs:
-                    logger.info(f"Returning {len(all_jobs)} jobs fetched before error")
-                break
+        async for page in self.iter_job_pages(max_pages=max_pages, what=what, country=country):
+            all_jobs.extend(page)
         
         logger.info(f"Total jobs fetched from Adzuna: {len(all_jobs)}")
         return all_jobs
@@ -169,19 +282,22 @@ class AdzunaClient:
         Returns:
             Normalized job dictionary
         """
+        # One keyword pass over each text; every classification below is a set lookup
+        title_lower = (job.get("title") or "").lower()
+        description_lower = (job.get("description") or "").lower()
+        title_hits = _keyword_categories(title_lower)
+        text_hits = title_hits | _keyword_categories(description_lower)
+        
         # Determine if it's an internship
-        title_lower = job.get("title", "").lower()
-        description_lower = job.get("description", "").lower()
-        is_internship = any(keyword in title_lower or keyword in description_lower 
-                           for keyword in ["intern", "internship", "co-op", "coop"])
+        is_internship = "intern" in text_hits
         
         # Determine job level
         job_level = "MID_LEVEL"
-        if is_internship or "entry" in title_lower or "junior" in title_lower:
+        if is_internship or "entry" in title_hits:
             job_level = "ENTRY_LEVEL"
-        elif any(keyword in title_lower for keyword in ["senior", "lead", "principal"]):
+        elif "senior" in title_hits:
             job_level = "SENIOR_LEVEL"
-        elif any(keyword in title_lower for keyword in ["director", "vp", "chief", "head of"]):
+        elif "executive" in title_hits:
             job_level = "EXECUTIVE"
         
         # Determine employment type
@@ -197,8 +313,7 @@ class AdzunaClient:
             employment_type = "CONTRACTOR"
         
         # Check if remote
-        is_remote = any(keyword in title_lower or keyword in description_lower 
-                       for keyword in ["remote", "work from home", "wfh", "telecommute"])
+        is_remote = "remote" in text_hits
         
         location_data = job.get("location", {})
         
@@ -229,6 +344,10 @@ class AdzunaClient:
             "contract_time": job.get("contract_time"),
             "redirect_url": job.get("redirect_url"),
             "is_internship": is_internship,
-            "is_remote": is_remote,
-            "raw_data": job
+            "is_remote": is_remote
         }
+
+
+# Shared client so every sync reuses the same warm connection pool;
+# closed in the application lifespan
+adzuna_client = AdzunaClient()
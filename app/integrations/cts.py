@@ -1,42 +1,212 @@
+import hashlib
+import itertools
 import logging
-import uuid
+import threading
 import time
 from typing import Dict, Any, Optional, List
+from cachetools import TTLCache
+from fastapi import Request
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from app.config import get_settings
 
+# Optional dependency: without it CTS integration is disabled
+try:
+    from google.cloud import talent_v4beta1
+    from google.cloud.talent_v4beta1.services.job_service.transports import JobServiceGrpcTransport
+    import google.auth
+    from google.api_core import exceptions as google_exceptions
+    from google.protobuf import field_mask_pb2
+    
+    # Enum values used for every job payload, resolved once
+    _COMPENSATION_TYPE_BASE = talent_v4beta1.CompensationInfo.CompensationType.BASE
+    _COMPENSATION_UNIT_YEARLY = talent_v4beta1.CompensationInfo.CompensationUnit.YEARLY
+    
+    # Transient gRPC failures worth retrying
+    _TRANSIENT_ERRORS = (
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError
+    )
+except ImportError:
+    talent_v4beta1 = None
+    _TRANSIENT_ERRORS = ()
+
+# One retry policy shared by every CTS RPC (see CTSClient._rpc)
+_cts_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type(_TRANSIENT_ERRORS),
+    reraise=True
+)
+
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+def make_requisition_id(adzuna_id: str) -> str:
+    """
+    Stable requisition ID for an Adzuna job. Stored on the Mongo job and sent to CTS,
+    so retried creates reuse the same ID.
+    """
+    adzuna_id = str(adzuna_id)
+    return f"req-{adzuna_id}-{hashlib.blake2b(adzuna_id.encode(), digest_size=4).hexdigest()}"
+
+
 class CTSClient:
     """
     Client for Google Cloud Talent Solution (CTS) integration.
     Handles job creation, updating, and deletion in CTS.
     """
     
+    # CTS accepts at most 200 jobs per batchCreate request
+    BATCH_MAX_JOBS = 200
+    BATCH_TIMEOUT_SECONDS = 300
+    
+    # Each gRPC channel is one HTTP/2 connection (~100 concurrent streams), so
+    # RPCs are spread round-robin over a small pool of channels. Fixed rather than
+    # per-CPU: /admin/sync-to-cts keeps at most 8 batch RPCs in flight
+    CHANNEL_POOL_SIZE = 4
+    
+    # Job fields update_job can change
+    UPDATABLE_FIELDS = ("title", "description")
+    
+    # Tenant companies change rarely; list them at most once per TTL
+    COMPANY_CACHE_TTL_SECONDS = 3600
+    
     def __init__(self):
         self.project_id = settings.GCP_PROJECT_ID
         self.parent = f"projects/{self.project_id}/tenants/default_tenant"
         self.enabled = False
+        self._client_cycle = None
+        self.company_client = None
+        self._company_cache: TTLCache = TTLCache(maxsize=1, ttl=self.COMPANY_CACHE_TTL_SECONDS)
+        self._company_cache_lock = threading.Lock()
+        
+        if talent_v4beta1 is None:
+            logger.warning("Google Cloud Talent Solution library not found. CTS integration disabled.")
+            return
         
         # Try to initialize CTS client
         try:
-            from google.cloud import talent_v4beta1
-            import google.auth
-            
             # verify credentials exist
             _, project = google.auth.default()
-            self.client = talent_v4beta1.JobServiceClient()
+            
+            # A local subchannel pool per channel stops gRPC from sharing one
+            # connection between them
+            clients = [
+                talent_v4beta1.JobServiceClient(
+                    transport=JobServiceGrpcTransport(
+                        channel=JobServiceGrpcTransport.create_channel(
+                            options=[("grpc.use_local_subchannel_pool", 1)]
+                        )
+                    )
+                )
+                for _ in range(self.CHANNEL_POOL_SIZE)
+            ]
+            self._client_cycle = itertools.cycle(clients)
+            self.company_client = talent_v4beta1.CompanyServiceClient()
             self.enabled = True
-            logger.info(f"CTS Client initialized for project: {self.project_id}")
+            logger.info("CTS Client initialized for project: %s", self.project_id)
             
-        except ImportError:
-            logger.warning("Google Cloud Talent Solution library not found. CTS integration disabled.")
         except Exception as e:
-            logger.warning(f"Failed to initialize CTS Client: {str(e)}. CTS integration disabled.")
+            logger.warning("Failed to initialize CTS Client: %s. CTS integration disabled.", e)
             
+    @property
+    def client(self):
+        """Next JobServiceClient from the channel pool"""
+        return next(self._client_cycle)
+
+    @_cts_retry
+    def _rpc(self, method: str, **kwargs):
+        """Call a JobService RPC; each attempt goes to the next pooled channel"""
+        return getattr(self.client, method)(**kwargs)
+
+    def list_companies(self, use_cache: bool = True, timeout: Optional[float] = None) -> Dict[str, str]:
+        """
+        List tenant companies, cached for COMPANY_CACHE_TTL_SECONDS.
+        
+        Args:
+            use_cache: False always issues the RPC (and refreshes the cache), e.g. for health probes
+            timeout: RPC timeout in seconds; None keeps the client library default
+        
+        Returns:
+            Mapping of company display name to resource name
+        
+        Raises:
+            RuntimeError: If CTS integration is disabled
+        """
+        if not self.enabled:
+            raise RuntimeError("CTS integration disabled")
+        
+        if use_cache:
+            with self._company_cache_lock:
+                companies = self._company_cache.get("companies")
+            if companies is not None:
+                return companies
+        
+        # The RPC runs outside the lock so a slow CTS doesn't block other callers
+        rpc_kwargs = {"timeout": timeout} if timeout is not None else {}
+        companies = {
+            company.display_name: company.name
+            for company in self.company_client.list_companies(parent=self.parent, **rpc_kwargs)
+        }
+        with self._company_cache_lock:
+            self._company_cache["companies"] = companies
+        return companies
+
     def generate_requisition_id(self, adzuna_id: str) -> str:
         """Generate a unique requisition ID for CTS"""
-        return f"req-{adzuna_id}-{uuid.uuid4().hex[:8]}"
+        return make_requisition_id(adzuna_id)
+
+    def _build_cts_job(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map normalized job data to a CTS job payload"""
+        # Map simple fields
+        job = {
+            "requisition_id": job_data.get("requisition_id") or self.generate_requisition_id(job_data.get("adzuna_id")),
+            "title": job_data.get("title", ""),
+            "description": job_data.get("description", ""),
+            "addresses": [job_data.get("location")] if job_data.get("location") else [],
+            "application_info": {
+                "uris": [job_data.get("redirect_url")] if job_data.get("redirect_url") else []
+            },
+            "language_code": "en-US",
+        }
+        
+        # Map structured compensation if available
+        salary_min = job_data.get("salary_min")
+        salary_max = job_data.get("salary_max")
+        if salary_min and salary_max:
+            currency = job_data.get("salary_currency", "USD")
+            min_money = {"currency_code": currency, "units": int(salary_min)}
+            job["compensation_info"] = {
+                "entries": [{
+                    "type_": _COMPENSATION_TYPE_BASE,
+                    "unit": _COMPENSATION_UNIT_YEARLY,
+                    "amount": min_money,
+                    "range_": {
+                        "min_compensation": min_money,
+                        "max_compensation": {"currency_code": currency, "units": int(salary_max)}
+                    }
+                }]
+            }
+        
+        # Map custom attributes
+        custom_attributes = {}
+        if job_data.get("is_remote"):
+            custom_attributes["remote"] = talent_v4beta1.CustomAttribute(
+                string_values=["true"],
+                filterable=True
+            )
+        
+        if job_data.get("job_level"):
+             custom_attributes["level"] = talent_v4beta1.CustomAttribute(
+                string_values=[job_data.get("job_level")],
+                filterable=True
+            )
+        
+        if custom_attributes:
+            job["custom_attributes"] = custom_attributes
+        
+        return job
 
     def create_job(self, job_data: Dict[str, Any]) -> Optional[str]:
         """
@@ -53,100 +223,97 @@ class CTSClient:
             return None
             
         try:
-            from google.cloud import talent_v4beta1
-            
-            # Map simple fields
-            job = {
-                "requisition_id": job_data.get("requisition_id") or self.generate_requisition_id(job_data.get("adzuna_id")),
-                "title": job_data.get("title", ""),
-                "description": job_data.get("description", ""),
-                "addresses": [job_data.get("location")] if job_data.get("location") else [],
-                "application_info": {
-                    "uris": [job_data.get("redirect_url")] if job_data.get("redirect_url") else []
-                },
-                "language_code": "en-US",
-            }
-            
-            # Map structured compensation if available
-            if job_data.get("salary_min") and job_data.get("salary_max"):
-                job["compensation_info"] = {
-                    "entries": [{
-                        "type_": talent_v4beta1.CompensationInfo.CompensationType.BASE,
-                        "unit": talent_v4beta1.CompensationInfo.CompensationUnit.YEARLY,
-                        "amount": {
-                            "currency_code": job_data.get("salary_currency", "USD"),
-                            "units": int(job_data.get("salary_min", 0))
-                        },
-                        "range_": {
-                            "min_compensation": {
-                                "currency_code": job_data.get("salary_currency", "USD"),
-                                "units": int(job_data.get("salary_min", 0))
-                            },
-                            "max_compensation": {
-                                "currency_code": job_data.get("salary_currency", "USD"),
-                                "units": int(job_data.get("salary_max", 0))
-                            }
-                        }
-                    }]
-                }
-            
-            # Map custom attributes
-            custom_attributes = {}
-            if job_data.get("is_remote"):
-                custom_attributes["remote"] = talent_v4beta1.CustomAttribute(
-                    string_values=["true"],
-                    filterable=True
-                )
-            
-            if job_data.get("job_level"):
-                 custom_attributes["level"] = talent_v4beta1.CustomAttribute(
-                    string_values=[job_data.get("job_level")],
-                    filterable=True
-                )
-            
-            if custom_attributes:
-                job["custom_attributes"] = custom_attributes
+            job = self._build_cts_job(job_data)
 
             # Create the job
-            response = self.client.create_job(
+            response = self._rpc(
+                "create_job",
                 parent=self.parent,
                 job=job
             )
             
-            logger.info(f"Created CTS job: {response.name}")
+            logger.info("Created CTS job: %s", response.name)
             return response.name
 
         except Exception as e:
-            logger.error(f"Failed to create job in CTS: {str(e)}")
+            logger.error("Failed to create job in CTS: %s", e)
             return None
 
+    def _run_batch(self, operation, action: str, requisition_ids: List[str]) -> List[Optional[str]]:
+        """Wait for a batch LRO and map its per-job results to job names (None on failure)"""
+        result = operation.result(timeout=self.BATCH_TIMEOUT_SECONDS)
+        
+        # Results come back in the same order as the input
+        names: List[Optional[str]] = []
+        for requisition_id, job_result in zip(requisition_ids, result.job_results):
+            if job_result.status.code == 0:
+                names.append(job_result.job.name)
+            else:
+                logger.error(
+                    "Failed to %s job %s in CTS: %s",
+                    action, requisition_id, job_result.status.message
+                )
+                names.append(None)
+        return names
+
+    def batch_create_jobs(
+        self,
+        jobs_data: List[Dict[str, Any]],
+        chunk_size: int = BATCH_MAX_JOBS
+    ) -> List[Optional[str]]:
+        """
+        Create jobs in CTS with one batchCreate call per chunk_size jobs.
+        
+        Args:
+            jobs_data: Normalized job data, one dict per job
+            chunk_size: Jobs per batchCreate call (capped at BATCH_MAX_JOBS)
+            
+        Returns:
+            Created job names in input order; None for jobs that failed or when disabled
+        """
+        if not self.enabled or not jobs_data:
+            logger.debug("CTS disabled, skipping batch job creation")
+            return [None] * len(jobs_data)
+        
+        chunk_size = min(chunk_size, self.BATCH_MAX_JOBS)
+        names: List[Optional[str]] = []
+        for start in range(0, len(jobs_data), chunk_size):
+            chunk = jobs_data[start:start + chunk_size]
+            try:
+                jobs = [self._build_cts_job(job_data) for job_data in chunk]
+                operation = self._rpc("batch_create_jobs", parent=self.parent, jobs=jobs)
+                names.extend(self._run_batch(operation, "create", [job["requisition_id"] for job in jobs]))
+            except Exception as e:
+                logger.error("Failed to batch create %d jobs in CTS: %s", len(chunk), e)
+                names.extend([None] * len(chunk))
+        
+        logger.info("Batch created %d/%d CTS jobs", sum(1 for n in names if n), len(jobs_data))
+        return names
+
     def update_job(self, cts_job_name: str, job_data: Dict[str, Any]) -> Optional[str]:
         """
         Update a job in CTS.
+        
+        Args:
+            cts_job_name: CTS job resource name
+            job_data: Normalized job data
         """
         if not self.enabled or not cts_job_name:
             return None
             
         try:
-            from google.cloud import talent_v4beta1
-            
-            # Prepare update mask and job object
-            # This is a simplified update for now
-            job = {
-                "name": cts_job_name,
-                "title": job_data.get("title"),
-                "description": job_data.get("description"),
-            }
-            
-            # In a real implementation we would define the update_mask properly
-            # For now we rely on the client to handle it or just do a partial update
+            # Only UPDATABLE_FIELDS go over the wire; the mask leaves the rest untouched in CTS
+            paths = list(self.UPDATABLE_FIELDS)
+            job = {"name": cts_job_name}
+            for field in paths:
+                job[field] = job_data.get(field)
             
-            response = self.client.update_job(job=job)
-            logger.info(f"Updated CTS job: {response.name}")
+            response = self._rpc("update_job", job=job, update_mask=field_mask_pb2.FieldMask(paths=paths))
+            logger.info("Updated CTS job: %s", response.name)
             return response.name
             
         except Exception as e:
-            logger.error(f"Failed to update job in CTS: {str(e)}")
+            logger.error("Failed to update job in CTS: %s", e)
             return None
 
     def delete_job(self, cts_job_name: str):
@@ -155,7 +322,12 @@ class CTSClient:
             return
             
         try:
-            self.client.delete_job(name=cts_job_name)
-            logger.info(f"Deleted CTS job: {cts_job_name}")
+            self._rpc("delete_job", name=cts_job_name)
+            logger.info("Deleted CTS job: %s", cts_job_name)
         except Exception as e:
-            logger.error(f"Failed to delete CTS job: {str(e)}")
+            logger.error("Failed to delete CTS job: %s", e)
+
+
+async def get_cts_client(request: Request) -> CTSClient:
+    """FastAPI dependency returning the app-wide CTSClient built at startup"""
+    return request.app.state.cts_client
@@ -1,19 +1,47 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
+import logging.handlers
+import queue
 from app.config import get_settings
-from app.database import connect_to_mongo, close_mongo_connection
+from app.database import connect_to_mongo, close_mongo_connection, get_database
 from app.scheduler import get_scheduler
+from app.integrations.adzuna import adzuna_client
+from app.integrations.cts import CTSClient
+from app.services.job_service_mongo import JobService
+from app.services.matching_service_mongo import MatchingService
+from app.utils.resume_parser import warm_parser_pool, shutdown_parser_pool
 from app.api import jobs, admin, health, types
 
 # Configure logging
+# Request handlers and sync workers only enqueue records; a listener thread
+# does the formatting and the blocking stderr writes
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_queue: queue.Queue = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
+log_listener = logging.handlers.QueueListener(_log_queue, _log_handler, respect_handler_level=True)
+log_listener.start()
 logger = logging.getLogger(__name__)
 
+
+class HealthCheckAccessFilter(logging.Filter):
+    """Drop uvicorn access-log records for /health probes"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        # uvicorn.access args: (client_addr, method, full_path, http_version, status_code)
+        args = record.args
+        return not (isinstance(args, tuple) and len(args) > 2 and str(args[2]).startswith("/health"))
+
+
+# Load balancer and liveness probes hit /health constantly; keep them out of the access log
+logging.getLogger("uvicorn.access").addFilter(HealthCheckAccessFilter())
+
 settings = get_settings()
 
 
@@ -33,6 +61,26 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"MongoDB connection failed: {str(e)}")
     
+    # Services are stateless apart from their clients, so share one of each.
+    # Built even when the startup ping failed: get_database() does no I/O and
+    # the client reconnects by itself once MongoDB is reachable
+    try:
+        db = get_database()
+        app.state.job_service = JobService(db)
+        app.state.matching_service = MatchingService(db)
+    except Exception as e:
+        logger.error(f"Service setup failed: {str(e)}")
+    
+    # One CTS client per process; credentials and channels are set up once
+    app.state.cts_client = CTSClient()
+    
+    # Start resume parser workers before the first upload arrives
+    try:
+        await warm_parser_pool()
+        logger.info("Resume parser pool started")
+    except Exception as e:
+        logger.error(f"Resume parser pool start failed: {str(e)}")
+    
     # Start scheduler
     try:
         scheduler = get_scheduler()
@@ -56,6 +104,15 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Scheduler stop failed: {str(e)}")
     
+    # Close pooled Adzuna connections
+    try:
+        await adzuna_client.aclose()
+    except Exception as e:
+        logger.error(f"Adzuna client close failed: {str(e)}")
+    
+    # Stop resume parser workers
+    shutdown_parser_pool()
+    
     # Close MongoDB connection
     try:
         await close_mongo_connection()
@@ -64,6 +121,9 @@ async def lifespan(app: FastAPI):
         logger.error(f"MongoDB close failed: {str(e)}")
     
     logger.info("Application shutdown complete")
+    
+    # Flush queued log records
+    log_listener.stop()
 
 
 # Create FastAPI app
@@ -71,16 +131,19 @@ app = FastAPI(
     title="Job Matching API",
     description="Production-grade job matching backend using Adzuna and Google Cloud Talent Solution",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Job lists carry long description strings; orjson encodes them much faster
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.cors_origins_list,
+    # No cookie or auth-header sessions, so no credentialed cross-origin requests
+    allow_credentials=False,
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["content-type"],
 )
 
 # Include routers
@@ -98,5 +161,10 @@ if __name__ == "__main__":
         host=settings.API_HOST,
         port=settings.API_PORT,
         reload=settings.DEBUG,
+        # uvloop + httptools ship with uvicorn[standard]; require them outside
+        # development instead of silently falling back to asyncio/h11.
+        # Single process on purpose: each worker would start its own scheduler
+        loop="auto" if settings.DEBUG else "uvloop",
+        http="auto" if settings.DEBUG else "httptools",
         log_level=settings.LOG_LEVEL.lower()
     )
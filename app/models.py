@@ -15,13 +15,12 @@ class PyObjectId(ObjectId):
         source_type: Any,
         handler: Any,
     ) -> core_schema.CoreSchema:
-        return core_schema.union_schema([
-            core_schema.is_instance_schema(ObjectId),
-            core_schema.chain_schema([
-                core_schema.str_schema(),
-                core_schema.no_info_plain_validator_function(cls.validate),
-            ])
-        ], serialization=core_schema.plain_serializer_function_ser_schema(str))
+        # validate() handles both ObjectId and str, so one plain validator
+        # avoids probing union branches for every document _id
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(str)
+        )
 
     @classmethod
     def validate(cls, v):
@@ -104,9 +103,6 @@ class Job(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     expires_at: Optional[datetime] = None
     last_synced_to_cts: Optional[datetime] = None
-    
-    # Raw data
-    raw_data: Optional[Dict[str, Any]] = None
 
 
 class JobSyncLog(BaseModel):
@@ -202,5 +198,8 @@ class EmailSubscription(BaseModel):
     job_level: Optional[str] = None  # ENTRY_LEVEL, MID_LEVEL, SENIOR_LEVEL, EXECUTIVE
     stipend_min: Optional[float] = None
     
+    # LocalRAGMatcher.resume_profile_to_doc(...) of resume_text, so email runs skip re-profiling
+    resume_profile: Optional[Dict[str, Any]] = None
+    
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
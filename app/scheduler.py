@@ -1,16 +1,47 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from jinja2 import Environment
 from datetime import datetime
+import asyncio
 from typing import List, Dict, Any, Optional
 import logging
 from app.config import get_settings
 from app.database import get_database
-from app.services.job_service_mongo import JobService
+from app.services.job_service_mongo import JobService, SUBSCRIPTION_MATCH_PROJECTION
 from app.utils.email_service import EmailService
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Personalized emails being sent through SES at once
+EMAIL_SEND_CONCURRENCY = 20
+
+# Personalized job matches email, compiled once; autoescape keeps job fields
+# from Adzuna (titles, company names, URLs) from injecting markup
+JOB_MATCHES_EMAIL_TEMPLATE = Environment(autoescape=True).from_string("""
+<html>
+<body style='font-family: Arial, sans-serif; line-height: 1.6; color: #333;'>
+    <h2 style='color: #2c3e50;'>Your Personalized Job Matches</h2>
+    <p>Based on your resume and preferences, here are the top {{ jobs|length }} job opportunities for you:</p>
+    <ul style='list-style-type: none; padding: 0;'>
+    {% for job in jobs %}
+        <li style='margin-bottom: 20px; padding: 15px; border: 1px solid #e2e8f0; border-radius: 12px; background-color: #ffffff; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);'>
+            <h3 style='margin: 0 0 10px 0; color: #1a202c; font-size: 18px;'>{{ job.title }}</h3>
+            <p style='margin: 5px 0; color: #4a5568;'><strong>Company:</strong> {{ job.company or 'Unknown' }}</p>
+            <p style='margin: 5px 0; color: #4a5568;'><strong>Location:</strong> {{ job.location or 'Not specified' }}</p>
+            <a href='{{ job.redirect_url or '#' }}' style='display: inline-block; margin-top: 15px; padding: 10px 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; text-decoration: none; border-radius: 8px; font-weight: bold;'>View Job Details</a>
+        </li>
+    {% endfor %}
+    </ul>
+    <hr style='margin: 30px 0; border: none; border-top: 1px solid #e0e0e0;'>
+    <p style='font-size: 12px; color: #95a5a6;'>
+        You're receiving this because you subscribed to job alerts at aiforjob.ai<br>
+        <a href='#' style='color: #3498db;'>Update preferences</a> | <a href='#' style='color: #e74c3c;'>Unsubscribe</a>
+    </p>
+</body>
+</html>
+""")
+
 
 class JobScheduler:
     """Scheduler for automated job refresh"""
@@ -22,7 +53,7 @@ class JobScheduler:
     async def send_personalized_emails_task(self, frequency: Optional[str] = None, email: Optional[str] = None):
         """Background task to send top job suggestions based on subscriber's resume"""
         logger.info(f"Starting scheduled personalized email delivery (freq={frequency or 'ALL'}, email={email or 'ALL'})")
-        db = await get_database()
+        db = get_database()
         
         try:
             job_service = JobService(db)
@@ -31,75 +62,56 @@ class JobScheduler:
             
             if email:
                 # Get specific subscription
-                subscription = await job_service.email_subscriptions_collection.find_one({"email": email})
+                subscription = await job_service.email_subscriptions_collection.find_one(
+                    {"email": email}, projection=SUBSCRIPTION_MATCH_PROJECTION
+                )
                 subscriptions = [subscription] if subscription else []
             else:
-                subscriptions = await job_service.get_all_subscriptions(frequency=frequency)
+                subscriptions = await job_service.get_all_subscriptions(
+                    frequency=frequency, projection=SUBSCRIPTION_MATCH_PROJECTION
+                )
             
+            # Skip subscribers without a resume before any matching work
+            with_resume = []
             for sub in subscriptions:
-                sub_email = sub["email"]
-                resume_text = sub.get("resume_text", "")
+                if sub.get("resume_text"):
+                    with_resume.append(sub)
+                else:
+                    logger.warning(f"No resume found for {sub['email']}, skipping")
+            
+            # Jobs are read and prepared once for all subscribers
+            matches = await matching_service.match_subscriptions(with_resume, max_results=10)
+            
+            # SES calls block, so they run in threads; the semaphore caps how many are in flight
+            semaphore = asyncio.Semaphore(EMAIL_SEND_CONCURRENCY)
+            
+            async def send_matches(sub_email: str, matched_jobs: List[Any]):
+                if not matched_jobs:
+                    logger.info(f"No matching jobs found for {sub_email}")
+                    return
                 
-                if not resume_text:
-                    logger.warning(f"No resume found for {sub_email}, skipping")
-                    continue
+                # Take top 10 jobs
+                top_jobs = matched_jobs[:10]
+                body_html = JOB_MATCHES_EMAIL_TEMPLATE.render(jobs=top_jobs)
                 
-                # Match jobs based on resume and preferences
-                try:
-                    matched_jobs = await matching_service.match_resume_to_jobs(
-                        resume_text=resume_text,
-                        location=sub.get("location"),
-                        internship_only=sub.get("internship_only", False),
-                        job_level=sub.get("job_level"),
-                        stipend_min=sub.get("stipend_min")
-                    )
-                    
-                    if not matched_jobs or len(matched_jobs) == 0:
-                        logger.info(f"No matching jobs found for {sub_email}")
-                        continue
-                    
-                    # Take top 10 jobs
-                    top_jobs = matched_jobs[:10]
-                    
-                    # Create HTML email body
-                    job_list_html = "<ul style='list-style-type: none; padding: 0;'>"
-                    for job in top_jobs:
-                        job_list_html += f"""
-                        <li style='margin-bottom: 20px; padding: 15px; border: 1px solid #e2e8f0; border-radius: 12px; background-color: #ffffff; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);'>
-                            <h3 style='margin: 0 0 10px 0; color: #1a202c; font-size: 18px;'>{job.title}</h3>
-                            <p style='margin: 5px 0; color: #4a5568;'><strong>Company:</strong> {job.company or 'Unknown'}</p>
-                            <p style='margin: 5px 0; color: #4a5568;'><strong>Location:</strong> {job.location or 'Not specified'}</p>
-                            <a href='{job.redirect_url or '#'}' style='display: inline-block; margin-top: 15px; padding: 10px 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; text-decoration: none; border-radius: 8px; font-weight: bold;'>View Job Details</a>
-                        </li>
-                        """
-                    job_list_html += "</ul>"
-                    
-                    body_html = f"""
-                    <html>
-                    <body style='font-family: Arial, sans-serif; line-height: 1.6; color: #333;'>
-                        <h2 style='color: #2c3e50;'>Your Personalized Job Matches</h2>
-                        <p>Based on your resume and preferences, here are the top {len(top_jobs)} job opportunities for you:</p>
-                        {job_list_html}
-                        <hr style='margin: 30px 0; border: none; border-top: 1px solid #e0e0e0;'>
-                        <p style='font-size: 12px; color: #95a5a6;'>
-                            You're receiving this because you subscribed to job alerts at aiforjob.ai<br>
-                            <a href='#' style='color: #3498db;'>Update preferences</a> | <a href='#' style='color: #e74c3c;'>Unsubscribe</a>
-                        </p>
-                    </body>
-                    </html>
-                    """
-                    
-                    EmailService.send_email(
+                async with semaphore:
+                    sent = await asyncio.to_thread(
+                        EmailService.send_email,
                         to_email=sub_email,
                         subject=f"🎯 {len(top_jobs)} Personalized Job Matches for You",
                         body_html=body_html
                     )
+                if sent:
                     logger.info(f"Sent {len(top_jobs)} job matches to {sub_email}")
-                    
-                except Exception as e:
-                    logger.error(f"Error matching jobs for {sub_email}: {str(e)}")
-                    continue
-                
+            
+            results = await asyncio.gather(
+                *(send_matches(sub["email"], matched_jobs) for sub, matched_jobs in matches),
+                return_exceptions=True
+            )
+            for (sub, _), result in zip(matches, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error sending job matches to {sub['email']}: {str(result)}")
+            
             logger.info(f"Personalized email delivery completed for {len(subscriptions)} users")
         except Exception as e:
             logger.error(f"Personalized email delivery failed: {str(e)}")
@@ -107,10 +119,10 @@ class JobScheduler:
     async def refresh_jobs_task(self):
         """Background task to refresh jobs from Adzuna"""
         logger.info("Starting scheduled job refresh")
-        db = await get_database()
+        db = get_database()
+        job_service = JobService(db)
         
         try:
-            job_service = JobService(db)
             sync_log = await job_service.sync_engineering_jobs()
             
             logger.info(
@@ -129,10 +129,26 @@ class JobListResponse(BaseModel):
 
 class RefreshJobsResponse(BaseModel):
     message: str
-    sync_id: int
+    sync_id: str
     status: str
 
 
+class SyncStatusResponse(BaseModel):
+    sync_id: str
+    sync_type: str
+    status: str
+    jobs_fetched: int = 0
+    jobs_created: int = 0
+    jobs_updated: int = 0
+    jobs_deleted: int = 0
+    jobs_failed: int = 0
+    search_query: Optional[str] = None
+    country: Optional[str] = None
+    error_message: Optional[str] = None
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+
+
 class HealthResponse(BaseModel):
     status: str
     timestamp: datetime
@@ -1,118 +1,154 @@
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import Request
+from pymongo import InsertOne, UpdateOne, ReadPreference
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError
+from pymongo.asynchronous.database import AsyncDatabase
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 from app.models import Job, JobSyncLog, Favorite, Bookmark, EmailSubscription
-from app.integrations.adzuna import AdzunaClient
+from app.integrations.adzuna import adzuna_client
+from app.integrations.cts import make_requisition_id
+from app.services.matching_service_mongo import LocalRAGMatcher, clear_match_cache
 from app.config import get_settings
 from bson import ObjectId
-import uuid
+from cachetools import TTLCache
 import asyncio
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Descriptions in job listings are cut to this many characters (plus "...")
+DESCRIPTION_PREVIEW_LENGTH = 500
+
+# $project stage for job listings: rows come back already shaped like
+# JobMatchResponse. Missing optional fields become explicit nulls, company and
+# is_internship get their defaults, and the description is truncated inside
+# MongoDB ($substrCP counts code points, so multi-byte characters are never split)
+JOB_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "job_id": {"$toString": "$_id"},
+    "adzuna_id": 1,
+    "title": 1,
+    "company": {
+        "$ifNull": [
+            {"$cond": [{"$eq": ["$company_display_name", ""]}, None, "$company_display_name"]},
+            "Unknown"
+        ]
+    },
+    "location": {"$ifNull": ["$location", None]},
+    "employment_type": {"$ifNull": ["$employment_type", None]},
+    "salary_min": {"$ifNull": ["$salary_min", None]},
+    "salary_max": {"$ifNull": ["$salary_max", None]},
+    "redirect_url": {"$ifNull": ["$redirect_url", None]},
+    "is_internship": {"$ifNull": ["$is_internship", False]},
+    "description": {
+        "$let": {
+            "vars": {"desc": {"$ifNull": ["$description", ""]}},
+            "in": {
+                "$cond": [
+                    {"$gt": [{"$strLenCP": "$$desc"}, DESCRIPTION_PREVIEW_LENGTH]},
+                    {"$concat": [{"$substrCP": ["$$desc", 0, DESCRIPTION_PREVIEW_LENGTH]}, "..."]},
+                    "$$desc"
+                ]
+            }
+        }
+    }
+}
+
+# Subscription fields read by the personalized email run (matching preferences)
+SUBSCRIPTION_MATCH_PROJECTION = {
+    "email": 1,
+    "resume_text": 1,
+    "resume_profile": 1,
+    "location": 1,
+    "internship_only": 1,
+    "job_level": 1,
+    "stipend_min": 1
+}
+
+# Subscription fields shown by GET /subscriptions (skips the stored resume)
+SUBSCRIPTION_INFO_PROJECTION = {
+    "_id": 0,
+    "email": 1,
+    "frequency": 1,
+    "is_enabled": 1,
+    "created_at": 1
+}
+
+# Engineering types and locations only change when a sync runs, so they are
+# cached in-process and dropped whenever a sync completes
+_job_meta_cache: TTLCache = TTLCache(maxsize=2, ttl=settings.CACHE_EXPIRY_HOURS * 3600)
+
+
+def clear_job_meta_cache():
+    """Drop cached engineering types and locations"""
+    _job_meta_cache.clear()
+
 
 class JobService:
     """Service for managing jobs with MongoDB"""
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncDatabase):
         self.db = db
         self.jobs_collection = db.jobs
         self.job_types_collection = db.job_types
+        # Metadata lookups tolerate slightly stale data, so replicas can serve them
+        self.jobs_metadata_collection = db.jobs.with_options(read_preference=ReadPreference.SECONDARY_PREFERRED)
+        self.job_types_metadata_collection = db.job_types.with_options(read_preference=ReadPreference.SECONDARY_PREFERRED)
         self.sync_logs_collection = db.job_sync_logs
         self.favorites_collection = db.favorites
         self.bookmarks_collection = db.bookmarks
         self.email_subscriptions_collection = db.email_subscriptions
-        self.adzuna_client = AdzunaClient()
+        self.adzuna_client = adzuna_client
     
     async def sync_jobs_from_adzuna(
         self,
         sync_type: str = "manual",
         max_pages: int = 20,
         search_query: Optional[str] = None,
-        country: Optional[str] = None
+        country: Optional[str] = None,
+        sync_log_id: Optional[ObjectId] = None
     ) -> JobSyncLog:
         """
         Fetch jobs from Adzuna, save to DB, and sync to CTS
         
+        Args:
+            sync_log_id: Existing sync log to report into (see create_sync_log);
+                a new one is created when omitted
+        
         Returns:
             JobSyncLog with sync statistics
         """
-        # Create sync log
-        sync_log = JobSyncLog(
-            sync_type=sync_type,
-            status="in_progress",
-            search_query=search_query,
-            country=country
-        )
-        
-        result = await self.sync_logs_collection.insert_one(sync_log.dict(by_alias=True))
-        sync_log_id = result.inserted_id
+        sync_log_id = await self._start_sync_log(sync_type, search_query, country, sync_log_id)
         
         try:
             logger.info(f"Starting job sync: type={sync_type}")
             
-            # Fetch jobs from Adzuna
-            jobs_data = await self.adzuna_client.fetch_all_jobs(
-                max_pages=max_pages,
-                what=search_query,
-                country=country
-            )
-            
-            # Update sync log
-            await self.sync_logs_collection.update_one(
-                {"_id": sync_log_id},
-                {"$set": {"jobs_fetched": len(jobs_data)}}
-            )
-            
-            logger.info(f"Fetched {len(jobs_data)} jobs from Adzuna")
-            
+            jobs_fetched = 0
             jobs_created = 0
             jobs_updated = 0
             jobs_failed = 0
             
-            # Process each job
-            for job_data in jobs_data:
-                try:
-                    parsed_job = self.adzuna_client.parse_job_data(job_data)
-                    
-                    # Check if job exists
-                    existing_job = await self.jobs_collection.find_one(
-                        {"adzuna_id": parsed_job["adzuna_id"]}
-                    )
-                    
-                    if existing_job:
-                        # Update existing job
-                        await self._update_job(existing_job, parsed_job)
-                        jobs_updated += 1
-                    else:
-                        # Create new job
-                        await self._create_job(parsed_job)
-                        jobs_created += 1
-                    
-                    # Extract and save job type
-                    # Use search_query as the canonical type if available (e.g. "Civil Engineer")
-                    # Otherwise fall back to category or title
-                    type_to_save = search_query if search_query else (parsed_job.get("category") or parsed_job.get("title"))
-                    
-                    if type_to_save:
-                        # Normalize to Title Case
-                        type_to_save = type_to_save.title()
-                        
-                        # Save to job_types collection
-                        await self.job_types_collection.update_one(
-                            {"name": type_to_save}, 
-                            {"$set": {"name": type_to_save, "category": parsed_job.get("category")}}, 
-                            upsert=True
-                        )
-                
-                except Exception as e:
-                    logger.error(f"Error processing job {job_data.get('id')}: {str(e)}")
-                    jobs_failed += 1
+            # Persist each page as it arrives instead of holding every page in memory
+            async for page in self.adzuna_client.iter_job_pages(
+                max_pages=max_pages,
+                what=search_query,
+                country=country
+            ):
+                jobs_fetched += len(page)
+                created, updated, failed = await self._save_job_page(page, search_query)
+                jobs_created += created
+                jobs_updated += updated
+                jobs_failed += failed
+            
+            logger.info(f"Fetched {jobs_fetched} jobs from Adzuna")
             
             # Mark old jobs as expired
             expired_count = await self._mark_expired_jobs()
+            clear_job_meta_cache()
+            # In-process match results may reference jobs that just expired
+            clear_match_cache()
             
             # Complete sync
             await self.sync_logs_collection.update_one(
@@ -120,6 +156,7 @@ class JobService:
                 {
                     "$set": {
                         "status": "completed",
+                        "jobs_fetched": jobs_fetched,
                         "jobs_created": jobs_created,
                         "jobs_updated": jobs_updated,
                         "jobs_deleted": expired_count,
@@ -153,84 +190,191 @@ class JobService:
             )
             raise
     
-    async def _create_job(self, job_data: Dict[str, Any]):
-        """Create new job in DB"""
-        try:
-            # Generate unique requisition ID locally
-            requisition_id = f"req-{job_data['adzuna_id']}-{uuid.uuid4().hex[:8]}"
-            
-            # Calculate expiry
-            expires_at = datetime.utcnow() + timedelta(days=settings.JOB_EXPIRY_DAYS)
-            
-            # Create job model
-            job = Job(
-                adzuna_id=job_data["adzuna_id"],
-                cts_job_name=None,
-                requisition_id=requisition_id,
-                title=job_data["title"],
-                description=job_data["description"],
-                company_display_name=job_data.get("company_display_name"),
-                location=job_data.get("location"),
-                location_structured=job_data.get("location_structured"),
-                employment_type=job_data.get("employment_type"),
-                job_level=job_data.get("job_level"),
-                salary_min=job_data.get("salary_min"),
-                salary_max=job_data.get("salary_max"),
-                salary_currency=job_data.get("salary_currency", "USD"),
-                category=job_data.get("category"),
-                contract_time=job_data.get("contract_time"),
-                redirect_url=job_data.get("redirect_url"),
-                is_internship=job_data.get("is_internship", False),
-                is_remote=job_data.get("is_remote", False),
-                status="active",
-                expires_at=expires_at,
-                last_synced_to_cts=None,
-                raw_data=job_data.get("raw_data")
+    async def create_sync_log(
+        self,
+        sync_type: str,
+        search_query: Optional[str] = None,
+        country: Optional[str] = None
+    ) -> ObjectId:
+        """
+        Record a pending sync so callers get its ID before the work starts
+        
+        Returns:
+            ID of the new sync log
+        """
+        sync_log = JobSyncLog(
+            sync_type=sync_type,
+            status="pending",
+            search_query=search_query,
+            country=country
+        )
+        result = await self.sync_logs_collection.insert_one(sync_log.dict(by_alias=True))
+        return result.inserted_id
+    
+    async def _start_sync_log(
+        self,
+        sync_type: str,
+        search_query: Optional[str] = None,
+        country: Optional[str] = None,
+        sync_log_id: Optional[ObjectId] = None
+    ) -> ObjectId:
+        """Mark an existing sync log in progress, or create one"""
+        if sync_log_id is not None:
+            await self.sync_logs_collection.update_one(
+                {"_id": sync_log_id},
+                {"$set": {"status": "in_progress", "started_at": datetime.utcnow()}}
             )
-            
-            # Insert into MongoDB
-            await self.jobs_collection.insert_one(job.dict(by_alias=True, exclude_none=True))
-            
-            logger.debug(f"Created job: {job.title}")
-            
-        except Exception as e:
-            logger.error(f"Error creating job: {str(e)}")
-            raise
+            return sync_log_id
+        
+        sync_log = JobSyncLog(
+            sync_type=sync_type,
+            status="in_progress",
+            search_query=search_query,
+            country=country
+        )
+        result = await self.sync_logs_collection.insert_one(sync_log.dict(by_alias=True))
+        return result.inserted_id
     
-    async def _update_job(self, existing_job: Dict[str, Any], job_data: Dict[str, Any]):
-        """Update existing job in DB"""
-        try:
-            # Update database
-            await self.jobs_collection.update_one(
-                {"_id": existing_job["_id"]},
-                {
-                    "$set": {
-                        "title": job_data["title"],
-                        "description": job_data["description"],
-                        "company_display_name": job_data.get("company_display_name"),
-                        "location": job_data.get("location"),
-                        "location_structured": job_data.get("location_structured"),
-                        "employment_type": job_data.get("employment_type"),
-                        "job_level": job_data.get("job_level"),
-                        "salary_min": job_data.get("salary_min"),
-                        "salary_max": job_data.get("salary_max"),
-                        "category": job_data.get("category"),
-                        "redirect_url": job_data.get("redirect_url"),
-                        "is_internship": job_data.get("is_internship", False),
-                        "is_remote": job_data.get("is_remote", False),
-                        "status": "active",
-                        "expires_at": datetime.utcnow() + timedelta(days=settings.JOB_EXPIRY_DAYS),
-                        "updated_at": datetime.utcnow(),
-                        "raw_data": job_data.get("raw_data")
+    async def get_sync_log(self, sync_id: str) -> Optional[Dict[str, Any]]:
+        """Get a sync log by ID"""
+        if not ObjectId.is_valid(sync_id):
+            return None
+        return await self.sync_logs_collection.find_one({"_id": ObjectId(sync_id)})
+    
+    async def _save_job_page(
+        self,
+        page: List[Dict[str, Any]],
+        search_query: Optional[str] = None
+    ) -> Tuple[int, int, int]:
+        """
+        Upsert one page of raw Adzuna jobs and their job types
+        
+        Returns:
+            (created, updated, failed) counts for the page
+        """
+        failed = 0
+        parsed_jobs: Dict[str, Dict[str, Any]] = {}
+        for job_data in page:
+            try:
+                parsed_job = self.adzuna_client.parse_job_data(job_data)
+                parsed_jobs[parsed_job["adzuna_id"]] = parsed_job
+            except Exception as e:
+                logger.error(f"Error processing job {job_data.get('id')}: {str(e)}")
+                failed += 1
+        
+        if not parsed_jobs:
+            return 0, 0, failed
+        
+        # One lookup for the whole page decides insert vs update
+        cursor = self.jobs_collection.find(
+            {"adzuna_id": {"$in": list(parsed_jobs)}},
+            {"_id": 1, "adzuna_id": 1}
+        )
+        existing_ids = {doc["adzuna_id"]: doc["_id"] async for doc in cursor}
+        
+        job_ops = []
+        job_types: Dict[str, Optional[str]] = {}
+        for adzuna_id, parsed_job in parsed_jobs.items():
+            if adzuna_id in existing_ids:
+                job_ops.append(UpdateOne(
+                    {"_id": existing_ids[adzuna_id]},
+                    {
+                        "$set": self._job_update_fields(parsed_job),
+                        # Older documents carried a full copy of the Adzuna payload
+                        "$unset": {"raw_data": ""}
                     }
-                }
-            )
-            
-            logger.debug(f"Updated job: {job_data['title']}")
-            
-        except Exception as e:
-            logger.error(f"Error updating job: {str(e)}")
-            raise
+                ))
+            else:
+                job_ops.append(InsertOne(self._new_job_document(parsed_job)))
+            
+            # Use search_query as the canonical type if available (e.g. "Civil Engineer")
+            # Otherwise fall back to category or title
+            type_to_save = search_query if search_query else (parsed_job.get("category") or parsed_job.get("title"))
+            if type_to_save:
+                # Normalize to Title Case
+                job_types[type_to_save.title()] = parsed_job.get("category")
+        
+        try:
+            result = await self.jobs_collection.bulk_write(job_ops, ordered=False)
+            created, updated = result.inserted_count, result.matched_count
+        except BulkWriteError as e:
+            # ordered=False: everything except the failed writes was applied
+            write_errors = e.details.get("writeErrors", [])
+            logger.error(f"Error saving {len(write_errors)} jobs: {write_errors[0].get('errmsg') if write_errors else ''}")
+            created, updated = e.details.get("nInserted", 0), e.details.get("nMatched", 0)
+            failed += len(write_errors)
+        
+        # Job types are secondary metadata: the jobs above are already saved,
+        # so a failure here (e.g. a duplicate-key upsert race) must not abort the sync
+        if job_types:
+            try:
+                await self.job_types_collection.bulk_write([
+                    UpdateOne({"name": name}, {"$set": {"name": name, "category": category}}, upsert=True)
+                    for name, category in job_types.items()
+                ], ordered=False)
+            except Exception as e:
+                logger.error(f"Error saving {len(job_types)} job types: {str(e)}")
+        
+        return created, updated, failed
+    
+    def _new_job_document(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the MongoDB document for a newly fetched job"""
+        # Same ID CTS is given for this job (adzuna_id is unique, so this is too)
+        requisition_id = make_requisition_id(job_data["adzuna_id"])
+        
+        # Calculate expiry
+        expires_at = datetime.utcnow() + timedelta(days=settings.JOB_EXPIRY_DAYS)
+        
+        # Create job model
+        job = Job(
+            adzuna_id=job_data["adzuna_id"],
+            cts_job_name=None,
+            requisition_id=requisition_id,
+            title=job_data["title"],
+            description=job_data["description"],
+            company_display_name=job_data.get("company_display_name"),
+            location=job_data.get("location"),
+            location_structured=job_data.get("location_structured"),
+            employment_type=job_data.get("employment_type"),
+            job_level=job_data.get("job_level"),
+            salary_min=job_data.get("salary_min"),
+            salary_max=job_data.get("salary_max"),
+            salary_currency=job_data.get("salary_currency", "USD"),
+            category=job_data.get("category"),
+            contract_time=job_data.get("contract_time"),
+            redirect_url=job_data.get("redirect_url"),
+            is_internship=job_data.get("is_internship", False),
+            is_remote=job_data.get("is_remote", False),
+            status="active",
+            expires_at=expires_at,
+            last_synced_to_cts=None
+        )
+        
+        # Keep an explicit null cts_job_name for the CTS backlog index
+        job_doc = job.dict(by_alias=True, exclude_none=True)
+        job_doc["cts_job_name"] = None
+        return job_doc
+    
+    def _job_update_fields(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields refreshed on an existing job when it is fetched again"""
+        return {
+            "title": job_data["title"],
+            "description": job_data["description"],
+            "company_display_name": job_data.get("company_display_name"),
+            "location": job_data.get("location"),
+            "location_structured": job_data.get("location_structured"),
+            "employment_type": job_data.get("employment_type"),
+            "job_level": job_data.get("job_level"),
+            "salary_min": job_data.get("salary_min"),
+            "salary_max": job_data.get("salary_max"),
+            "category": job_data.get("category"),
+            "redirect_url": job_data.get("redirect_url"),
+            "is_internship": job_data.get("is_internship", False),
+            "is_remote": job_data.get("is_remote", False),
+            "status": "active",
+            "expires_at": datetime.utcnow() + timedelta(days=settings.JOB_EXPIRY_DAYS),
+            "updated_at": datetime.utcnow()
+        }
     
     async def _mark_expired_jobs(self) -> int:
         """Mark jobs as expired if they're past expiry date"""
@@ -269,7 +413,7 @@ class JobService:
         Get jobs with optional filters
         
         Returns:
-            Tuple of (jobs list, total count)
+            Tuple of (jobs list shaped by JOB_SUMMARY_PROJECTION, total count)
         """
         # Build query
         query = {"status": "active"}
@@ -300,12 +444,27 @@ class JobService:
         if country:
             query["location_structured.country"] = {"$regex": f"^{country}$", "$options": "i"}
         
-        # Get total count
-        total = await self.jobs_collection.count_documents(query)
+        # Get jobs, shaping rows and truncating descriptions server-side so
+        # full text never crosses the wire. $sort stays next to $limit so Mongo
+        # does a top-k sort (a $facet with a $count branch would pull every
+        # matching document, description included, through the pipeline)
+        pipeline = [
+            {"$match": query},
+            {"$sort": {"created_at": -1}},
+            {"$skip": skip},
+            {"$limit": limit},
+            {"$project": JOB_SUMMARY_PROJECTION}
+        ]
+        
+        async def fetch_page() -> List[Dict[str, Any]]:
+            cursor = await self.jobs_collection.aggregate(pipeline)
+            return await cursor.to_list(length=limit)
         
-        # Get jobs
-        cursor = self.jobs_collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        jobs = await cursor.to_list(length=limit)
+        # Page and total count are independent, so run them concurrently
+        jobs, total = await asyncio.gather(
+            fetch_page(),
+            self.jobs_collection.count_documents(query)
+        )
         
         return jobs, total
     
@@ -322,14 +481,26 @@ class JobService:
 
     async def get_engineering_job_types(self) -> List[str]:
         """Get all stored engineering job types"""
-        cursor = self.job_types_collection.find({}, {"name": 1, "_id": 0})
-        types = await cursor.to_list(length=1000)
-        return sorted([t["name"] for t in types if t.get("name")])
+        types = _job_meta_cache.get("engineering_types")
+        if types is None:
+            cursor = self.job_types_metadata_collection.find({}, {"name": 1, "_id": 0})
+            docs = await cursor.to_list(length=1000)
+            types = sorted([t["name"] for t in docs if t.get("name")])
+            _job_meta_cache["engineering_types"] = types
+        return types
 
     async def get_all_locations(self) -> List[str]:
         """Get all unique country locations from stored jobs"""
-        countries = await self.jobs_collection.distinct("location_structured.country")
-        return sorted([c for c in countries if c])
+        locations = _job_meta_cache.get("locations")
+        if locations is None:
+            # Served from the (status, location_structured.country) index
+            countries = await self.jobs_metadata_collection.distinct(
+                "location_structured.country",
+                {"status": "active"}
+            )
+            locations = sorted([c for c in countries if c])
+            _job_meta_cache["locations"] = locations
+        return locations
 
     async def delete_jobs_not_updated_since(self, timestamp: datetime) -> int:
         """Delete jobs that haven't been updated since the given timestamp"""
@@ -344,13 +515,14 @@ class JobService:
             logger.error(f"Error deleting old jobs: {str(e)}")
             return 0
 
-    async def sync_engineering_jobs(self) -> JobSyncLog:
+    async def sync_engineering_jobs(self, sync_log_id: Optional[ObjectId] = None) -> JobSyncLog:
         """
         Sync top 10 engineering job types and delete old jobs (Daily Refresh).
         Target: ~5000 jobs.
         """
         # Clear existing polluted job types to ensure only generic types remain
         await self.job_types_collection.delete_many({})
+        clear_job_meta_cache()
         logger.info("Cleared job_types collection")
 
         # Top 10 Engineering Fields (10 pages each * 50 = 500 jobs/type => 5000 total)
@@ -375,12 +547,7 @@ class JobService:
         total_failed = 0
         
         # Create a parent sync log
-        sync_log = JobSyncLog(
-            sync_type="daily_engineering_mass_sync",
-            status="in_progress"
-        )
-        result = await self.sync_logs_collection.insert_one(sync_log.dict(by_alias=True))
-        sync_log_id = result.inserted_id
+        sync_log_id = await self._start_sync_log("daily_engineering_mass_sync", sync_log_id=sync_log_id)
         
         try:
             for query, pages in ENGINEERING_CONFIG.items():
@@ -406,6 +573,8 @@ class JobService:
             
             # Delete old jobs
             deleted_count = await self.delete_jobs_not_updated_since(start_time)
+            clear_job_meta_cache()
+            clear_match_cache()
             
             # Update main log
             await self.sync_logs_collection.update_one(
@@ -439,7 +608,7 @@ class JobService:
             )
             raise
 
-    async def sync_multi_region_engineering_jobs(self) -> JobSyncLog:
+    async def sync_multi_region_engineering_jobs(self, sync_log_id: Optional[ObjectId] = None) -> JobSyncLog:
         """
         Sync engineering jobs from multiple regions with a specific ratio.
         Ratio: US (70%), India (15%), Others (15% - GB, CA, AU)
@@ -463,12 +632,7 @@ class JobService:
         total_updated = 0
         total_failed = 0
         
-        sync_log = JobSyncLog(
-            sync_type="multi_region_engineering_sync",
-            status="in_progress"
-        )
-        result = await self.sync_logs_collection.insert_one(sync_log.dict(by_alias=True))
-        sync_log_id = result.inserted_id
+        sync_log_id = await self._start_sync_log("multi_region_engineering_sync", sync_log_id=sync_log_id)
         
         try:
             for region in REGIONAL_CONFIG:
@@ -553,17 +717,30 @@ class JobService:
             await self.favorites_collection.insert_one(favorite.dict(by_alias=True))
             return True
 
-    async def get_user_favorites(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all favorite jobs for a user"""
-        cursor = self.favorites_collection.find({"user_id": user_id})
-        favorites = await cursor.to_list(length=1000)
+    async def _get_saved_jobs(self, collection: AsyncCollection, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Join a user's favorites/bookmarks to their jobs in one aggregation
         
-        job_ids = [ObjectId(f["job_id"]) for f in favorites]
-        if not job_ids:
-            return []
-            
-        cursor = self.jobs_collection.find({"_id": {"$in": job_ids}})
+        Returns:
+            Jobs shaped by JOB_SUMMARY_PROJECTION
+        """
+        cursor = await collection.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$limit": 1000},
+            # job_id is stored as a string; malformed IDs become null and match nothing
+            {"$addFields": {
+                "job_oid": {"$convert": {"input": "$job_id", "to": "objectId", "onError": None, "onNull": None}}
+            }},
+            {"$lookup": {"from": "jobs", "localField": "job_oid", "foreignField": "_id", "as": "job"}},
+            {"$unwind": "$job"},
+            {"$replaceRoot": {"newRoot": "$job"}},
+            {"$project": JOB_SUMMARY_PROJECTION}
+        ])
         return await cursor.to_list(length=1000)
+    
+    async def get_user_favorites(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get all favorite jobs for a user (shaped by JOB_SUMMARY_PROJECTION)"""
+        return await self._get_saved_jobs(self.favorites_collection, user_id)
 
     async def toggle_bookmark(self, user_id: str, job_id: str) -> bool:
         """
@@ -584,16 +761,8 @@ class JobService:
             return True
 
     async def get_user_bookmarks(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all bookmarked jobs for a user"""
-        cursor = self.bookmarks_collection.find({"user_id": user_id})
-        bookmarks = await cursor.to_list(length=1000)
-        
-        job_ids = [ObjectId(b["job_id"]) for b in bookmarks]
-        if not job_ids:
-            return []
-            
-        cursor = self.jobs_collection.find({"_id": {"$in": job_ids}})
-        return await cursor.to_list(length=1000)
+        """Get all bookmarked jobs for a user (shaped by JOB_SUMMARY_PROJECTION)"""
+        return await self._get_saved_jobs(self.bookmarks_collection, user_id)
 
     async def subscribe_email(
         self, 
@@ -612,10 +781,16 @@ class JobService:
         """
         from datetime import datetime
         
-        existing = await self.email_subscriptions_collection.find_one({"email": email})
+        existing = await self.email_subscriptions_collection.find_one({"email": email}, {"_id": 1})
+        
+        # Profile the resume once here instead of on every scheduled email run
+        resume_profile = LocalRAGMatcher.resume_profile_to_doc(
+            await asyncio.to_thread(LocalRAGMatcher.build_resume_profile, resume_text)
+        )
         
         update_data = {
             "resume_text": resume_text,
+            "resume_profile": resume_profile,
             "frequency": frequency,
             "is_enabled": is_enabled,
             "location": location,
@@ -640,18 +815,28 @@ class JobService:
             location=location,
             internship_only=internship_only,
             job_level=job_level,
-            stipend_min=stipend_min
+            stipend_min=stipend_min,
+            resume_profile=resume_profile
         )
         await self.email_subscriptions_collection.insert_one(subscription.dict(by_alias=True))
         return True
 
-    async def get_all_subscriptions(self, frequency: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get active subscribed emails, optionally filtered by frequency"""
+    async def get_all_subscriptions(
+        self,
+        frequency: Optional[str] = None,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get active subscribed emails, optionally filtered by frequency
+        
+        Args:
+            projection: Fields to return (e.g. SUBSCRIPTION_MATCH_PROJECTION); all when omitted
+        """
         query = {"is_enabled": True}
         if frequency:
             query["frequency"] = frequency
             
-        cursor = self.email_subscriptions_collection.find(query)
+        cursor = self.email_subscriptions_collection.find(query, projection=projection)
         return await cursor.to_list(length=10000)
 
     async def unsubscribe_email(self, email: str) -> bool:
@@ -668,3 +853,8 @@ class JobService:
         # Here we'll return top 5 recent active jobs as a 'personalized' fallback.
         cursor = self.jobs_collection.find({"status": "active"}).sort("created_at", -1).limit(limit)
         return await cursor.to_list(length=limit)
+
+
+async def get_job_service(request: Request) -> JobService:
+    """FastAPI dependency returning the app-wide JobService built at startup"""
+    return request.app.state.job_service
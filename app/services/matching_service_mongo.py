@@ -1,19 +1,54 @@
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import Request
+from pymongo.asynchronous.database import AsyncDatabase
 from typing import List, Dict, Any, Optional, Set, Tuple
+import asyncio
 import hashlib
 from datetime import datetime, timedelta
 import logging
 import re
 from collections import Counter
 import math
+from cachetools import TTLCache
+from bson import ObjectId
 from app.models import ResumeSearchCache
 from app.schemas import JobMatchResponse
 from app.config import get_settings
-from bson import ObjectId
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# In-process cache of recent resume matches, checked before resume_search_cache
+# so repeat searches skip the MongoDB round-trip as well as the scoring
+MATCH_CACHE_TTL_SECONDS = 900
+MATCH_CACHE_MAX_ENTRIES = 1024
+
+_match_cache: TTLCache = TTLCache(maxsize=MATCH_CACHE_MAX_ENTRIES, ttl=MATCH_CACHE_TTL_SECONDS)
+
+# Bump when build_resume_profile changes so stored subscription profiles are rebuilt
+RESUME_PROFILE_VERSION = 1
+
+# Fields read by scoring, the hard filters and _build_match_responses
+# (skips location_structured and the other wide fields of candidate jobs)
+MATCH_CANDIDATE_PROJECTION = {
+    "adzuna_id": 1,
+    "requisition_id": 1,
+    "title": 1,
+    "description": 1,
+    "company_display_name": 1,
+    "location": 1,
+    "employment_type": 1,
+    "job_level": 1,
+    "salary_min": 1,
+    "salary_max": 1,
+    "redirect_url": 1,
+    "is_internship": 1
+}
+
+
+def clear_match_cache():
+    """Drop all in-process resume match results"""
+    _match_cache.clear()
+
 
 class LocalRAGMatcher:
     """
@@ -108,7 +143,11 @@ class LocalRAGMatcher:
     @staticmethod
     def _extract_skills(text: str) -> Set[str]:
         """Extract tech skills from text"""
-        cleaned_text = LocalRAGMatcher._clean_text(text)
+        return LocalRAGMatcher._skills_in_clean(LocalRAGMatcher._clean_text(text))
+    
+    @staticmethod
+    def _skills_in_clean(cleaned_text: str) -> Set[str]:
+        """_extract_skills for text already passed through _clean_text"""
         found_skills = set()
         
         for skill in LocalRAGMatcher.TECH_SKILLS:
@@ -129,7 +168,19 @@ class LocalRAGMatcher:
         if not resume_keywords:
             return 0.0
         
-        job_text_clean = LocalRAGMatcher._clean_text(job_text)
+        return LocalRAGMatcher._keyword_match_clean(
+            resume_keywords, LocalRAGMatcher._clean_text(job_text)
+        )
+    
+    @staticmethod
+    def _keyword_match_clean(
+        resume_keywords: List[Tuple[str, float]],
+        job_text_clean: str
+    ) -> float:
+        """_calculate_keyword_match against text already passed through _clean_text"""
+        if not resume_keywords:
+            return 0.0
+        
         total_weight = 0.0
         matched_weight = 0.0
         
@@ -166,9 +217,12 @@ class LocalRAGMatcher:
         if not resume_skills:
             return 0.0
         
-        job_skills = LocalRAGMatcher._extract_skills(job_text)
-        
-        if not job_skills:
+        return LocalRAGMatcher._skill_overlap(resume_skills, LocalRAGMatcher._extract_skills(job_text))
+    
+    @staticmethod
+    def _skill_overlap(resume_skills: Set[str], job_skills: Set[str]) -> float:
+        """Jaccard similarity of two skill sets"""
+        if not resume_skills or not job_skills:
             return 0.0
         
         # Calculate Jaccard similarity
@@ -186,13 +240,18 @@ class LocalRAGMatcher:
         Calculate cosine-like similarity between two texts
         Returns score between 0 and 1
         """
-        words1 = set(LocalRAGMatcher._clean_text(text1).split())
-        words2 = set(LocalRAGMatcher._clean_text(text2).split())
-        
-        # Remove stop words
-        words1 = words1 - LocalRAGMatcher.STOP_WORDS
-        words2 = words2 - LocalRAGMatcher.STOP_WORDS
-        
+        return LocalRAGMatcher._word_overlap(
+            LocalRAGMatcher._content_words(text1), LocalRAGMatcher._content_words(text2)
+        )
+    
+    @staticmethod
+    def _content_words(text: str) -> Set[str]:
+        """Distinct cleaned words of text, without stop words"""
+        return set(LocalRAGMatcher._clean_text(text).split()) - LocalRAGMatcher.STOP_WORDS
+    
+    @staticmethod
+    def _word_overlap(words1: Set[str], words2: Set[str]) -> float:
+        """Jaccard similarity of two word sets"""
         if not words1 or not words2:
             return 0.0
         
@@ -206,45 +265,95 @@ class LocalRAGMatcher:
         return intersection / union
     
     @staticmethod
-    def match_resume_to_job(resume_text: str, job: Dict[str, Any]) -> float:
+    def build_resume_profile(resume_text: str) -> Dict[str, Any]:
         """
-        Match a resume to a single job using local RAG techniques
+        Extract the resume-side features once so they can be reused
+        for every candidate job
         
-        Args:
-            resume_text: Full resume text
-            job: Job document from database
-            
         Returns:
-            Match score between 0 and 1
+            Dict with resume keywords, skills and the text used for similarity
         """
-        # Extract resume features
-        resume_keywords = LocalRAGMatcher._extract_keywords(resume_text, top_n=40)
-        resume_skills = LocalRAGMatcher._extract_skills(resume_text)
+        return {
+            "keywords": LocalRAGMatcher._extract_keywords(resume_text, top_n=40),
+            "skills": LocalRAGMatcher._extract_skills(resume_text),
+            "head_words": LocalRAGMatcher._content_words(resume_text[:1000])  # First 1000 chars of resume
+        }
+    
+    @staticmethod
+    def resume_profile_to_doc(resume_profile: Dict[str, Any]) -> Dict[str, Any]:
+        """BSON-friendly form of a build_resume_profile result, for storing on a subscription"""
+        return {
+            "version": RESUME_PROFILE_VERSION,
+            "keywords": [[keyword, weight] for keyword, weight in resume_profile["keywords"]],
+            "skills": sorted(resume_profile["skills"]),
+            "head_words": sorted(resume_profile["head_words"])
+        }
+    
+    @staticmethod
+    def resume_profile_from_doc(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Inverse of resume_profile_to_doc; None if missing or built by an older matcher"""
+        if not doc or doc.get("version") != RESUME_PROFILE_VERSION:
+            return None
+        return {
+            "keywords": [(keyword, weight) for keyword, weight in doc["keywords"]],
+            "skills": set(doc["skills"]),
+            "head_words": set(doc["head_words"])
+        }
+    
+    @staticmethod
+    def build_job_profile(job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Extract the job-side features once so a job can be scored against
+        many resumes without re-cleaning its text
         
+        Returns:
+            Dict with the cleaned job text and title, skills and head words
+        """
         # Combine job title and description for matching
         job_title = job.get("title", "")
         job_description = job.get("description", "")
         job_company = job.get("company_display_name", "")
         job_full_text = f"{job_title} {job_title} {job_description} {job_company}"
+        job_text_clean = LocalRAGMatcher._clean_text(job_full_text)
+        
+        return {
+            "text": job_text_clean,
+            "title": LocalRAGMatcher._clean_text(job_title),
+            "skills": LocalRAGMatcher._skills_in_clean(job_text_clean),
+            "head_words": LocalRAGMatcher._content_words(job_full_text[:1000])  # First 1000 chars of job
+        }
+    
+    @staticmethod
+    def score_job(resume_profile: Dict[str, Any], job: Dict[str, Any]) -> float:
+        """
+        Score a single job against a profile from build_resume_profile
         
-        # Calculate different match scores
-        keyword_score = LocalRAGMatcher._calculate_keyword_match(
-            resume_keywords, job_full_text
+        Returns:
+            Match score between 0 and 1
+        """
+        return LocalRAGMatcher.score_profiles(
+            resume_profile, LocalRAGMatcher.build_job_profile(job)
         )
+    
+    @staticmethod
+    def score_profiles(resume_profile: Dict[str, Any], job_profile: Dict[str, Any]) -> float:
+        """
+        Score a profile from build_resume_profile against one from build_job_profile
         
-        skill_score = LocalRAGMatcher._calculate_skill_match(
-            resume_skills, job_full_text
-        )
+        Returns:
+            Match score between 0 and 1
+        """
+        resume_keywords = resume_profile["keywords"]
         
-        text_sim_score = LocalRAGMatcher._calculate_text_similarity(
-            resume_text[:1000],  # First 1000 chars of resume
-            job_full_text[:1000]  # First 1000 chars of job
-        )
+        # Calculate different match scores
+        keyword_score = LocalRAGMatcher._keyword_match_clean(resume_keywords, job_profile["text"])
+        skill_score = LocalRAGMatcher._skill_overlap(resume_profile["skills"], job_profile["skills"])
+        text_sim_score = LocalRAGMatcher._word_overlap(resume_profile["head_words"], job_profile["head_words"])
         
         # Title match (very important)
-        title_match = LocalRAGMatcher._calculate_keyword_match(
+        title_match = LocalRAGMatcher._keyword_match_clean(
             resume_keywords[:10],  # Top 10 resume keywords
-            job_title
+            job_profile["title"]
         )
         
         # Weighted combination (tune these weights)
@@ -256,12 +365,100 @@ class LocalRAGMatcher:
         )
         
         return min(final_score, 1.0)
+    
+    @staticmethod
+    def match_resume_to_job(resume_text: str, job: Dict[str, Any]) -> float:
+        """
+        Match a resume to a single job using local RAG techniques
+        
+        When scoring many jobs, build the profile once with build_resume_profile
+        and call score_job instead.
+        
+        Args:
+            resume_text: Full resume text
+            job: Job document from database
+            
+        Returns:
+            Match score between 0 and 1
+        """
+        return LocalRAGMatcher.score_job(
+            LocalRAGMatcher.build_resume_profile(resume_text), job
+        )
+    
+    @staticmethod
+    def rank_jobs(
+        resume_text: str,
+        jobs: List[Dict[str, Any]],
+        min_score: float = 0.05
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Score jobs against a resume, extracting resume features only once
+        
+        Returns:
+            (job, score) pairs above min_score, best first
+        """
+        resume_profile = LocalRAGMatcher.build_resume_profile(resume_text)
+        scored_jobs = []
+        for job in jobs:
+            score = LocalRAGMatcher.score_job(resume_profile, job)
+            if score > min_score:
+                scored_jobs.append((job, score))
+        
+        scored_jobs.sort(key=lambda x: x[1], reverse=True)
+        return scored_jobs
+    
+    @staticmethod
+    def rank_job_profiles(
+        resume_profile: Dict[str, Any],
+        candidates: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+        min_score: float = 0.05
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        rank_jobs for a prepared resume profile and (job, build_job_profile(job))
+        pairs prepared in advance
+        
+        Returns:
+            (job, score) pairs above min_score, best first
+        """
+        scored_jobs = []
+        for job, job_profile in candidates:
+            score = LocalRAGMatcher.score_profiles(resume_profile, job_profile)
+            if score > min_score:
+                scored_jobs.append((job, score))
+        
+        scored_jobs.sort(key=lambda x: x[1], reverse=True)
+        return scored_jobs
+
+
+def _passes_hard_filters(
+    job: Dict[str, Any],
+    internship_only: Optional[bool] = False,
+    job_level: Optional[str] = None,
+    stipend_min: Optional[float] = None
+) -> bool:
+    """Internship, stipend and job level constraints applied before scoring"""
+    # Internship filter
+    if internship_only and not job.get("is_internship"):
+        return False
+    
+    # Stipend filter
+    if stipend_min:
+        s_min = job.get("salary_min")
+        s_max = job.get("salary_max")
+        if not ((s_min and s_min >= stipend_min) or (s_max and s_max >= stipend_min)):
+            return False
+    
+    # Job Level filter
+    if job_level and job.get("job_level") != job_level:
+        return False
+    
+    return True
 
 
 class MatchingService:
     """Service for job matching using CTS with MongoDB"""
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncDatabase):
         self.db = db
         self.jobs_collection = db.jobs
         self.cache_collection = db.resume_search_cache
@@ -276,11 +473,22 @@ class MatchingService:
         stipend_min: Optional[float] = None
     ) -> str:
         """Generate cache key from search parameters"""
-        cache_string = f"{resume_text}:{location}:{internship_only}:{job_level}:{stipend_min}"
-        return hashlib.sha256(cache_string.encode()).hexdigest()
+        # Scoring lower-cases the resume anyway, so case and outer whitespace
+        # don't change results
+        cache_string = f"{resume_text.strip().lower()}|{location}|{internship_only}|{job_level}|{stipend_min}"
+        return hashlib.blake2b(cache_string.encode(), digest_size=16).hexdigest()
+    
+    async def _active_job_ids(self, job_ids: List[str]) -> Set[str]:
+        """The subset of job_ids that are still active jobs"""
+        object_ids = [ObjectId(job_id) for job_id in job_ids if ObjectId.is_valid(job_id)]
+        cursor = self.jobs_collection.find(
+            {"_id": {"$in": object_ids}, "status": "active"},
+            projection={"_id": 1}
+        )
+        return {str(job["_id"]) async for job in cursor}
     
     async def _get_cached_results(self, cache_key: str) -> Optional[List[Dict[str, Any]]]:
-        """Get cached search results if valid"""
+        """Get cached match responses if valid"""
         cache_entry = await self.cache_collection.find_one({
             "resume_hash": cache_key,
             "expires_at": {"$gt": datetime.utcnow()}
@@ -301,7 +509,7 @@ class MatchingService:
         job_level: Optional[str] = None,
         stipend_min: Optional[float] = None
     ):
-        """Cache search results"""
+        """Cache search results (one entry per key, refreshed in place)"""
         try:
             cache_entry = ResumeSearchCache(
                 resume_hash=cache_key,
@@ -313,7 +521,11 @@ class MatchingService:
                 expires_at=datetime.utcnow() + timedelta(hours=self.cache_expiry_hours)
             )
             
-            await self.cache_collection.insert_one(cache_entry.dict(by_alias=True))
+            await self.cache_collection.update_one(
+                {"resume_hash": cache_key},
+                {"$set": cache_entry.dict(by_alias=True, exclude={"id"})},
+                upsert=True
+            )
             logger.info("Cached search results")
         except Exception as e:
             logger.error(f"Failed to cache results: {str(e)}")
@@ -338,20 +550,19 @@ class MatchingService:
             resume_text, location, internship_only, job_level, stipend_min
         )
         
+        local_results = _match_cache.get(cache_key)
+        if local_results is not None:
+            return list(local_results)
+        
         cached_results = await self._get_cached_results(cache_key)
-        if cached_results and len(cached_results) > 0:
-            # Fetch jobs from DB
-            job_ids = [ObjectId(r["job_id"]) for r in cached_results]
-            cursor = self.jobs_collection.find({
-                "_id": {"$in": job_ids},
-                "status": "active"
-            })
-            jobs = await cursor.to_list(length=len(job_ids))
-            
-            # Map scores
-            score_map = {str(r["job_id"]): r["score"] for r in cached_results}
-            
-            return self._build_match_responses(jobs, score_map)
+        if cached_results:
+            # Cache holds the finished responses; one _id lookup drops jobs that
+            # have expired or been deleted since the entry was written
+            responses = [JobMatchResponse(**r) for r in cached_results]
+            active_ids = await self._active_job_ids([r.job_id for r in responses])
+            responses = [r for r in responses if r.job_id in active_ids]
+            _match_cache[cache_key] = responses
+            return list(responses)
         
         # Build query for candidate jobs
         query_filter = {"status": "active"}
@@ -365,7 +576,7 @@ class MatchingService:
         # Ideally, we should use a vector db, but for "local RAG" with <10k jobs, we can do in-memory scoring.
         
         # Optimize: Fetch only necessary fields for initial scoring if possible, but we need text.
-        cursor = self.jobs_collection.find(query_filter)
+        cursor = self.jobs_collection.find(query_filter, projection=MATCH_CANDIDATE_PROJECTION)
         candidate_jobs = await cursor.to_list(length=5000) # Fetch up to 5000 jobs
         
         logger.info(f"Local RAG: Scoring {len(candidate_jobs)} candidate jobs against resume")
@@ -374,36 +585,18 @@ class MatchingService:
         # but pre-filtering for hard constraints improves performance)
         
         # Filter by hard constraints first to reduce scoring load
-        filtered_candidates = []
-        for job in candidate_jobs:
-            # Internship filter
-            if internship_only and not job.get("is_internship"):
-                continue
-            
-            # Stipend filter
-            if stipend_min:
-                s_min = job.get("salary_min")
-                s_max = job.get("salary_max")
-                if not ((s_min and s_min >= stipend_min) or (s_max and s_max >= stipend_min)):
-                    continue
-            
-            # Job Level filter
-            if job_level and job.get("job_level") != job_level:
-                continue
-
-            filtered_candidates.append(job)
-            
+        filtered_candidates = [
+            job for job in candidate_jobs
+            if _passes_hard_filters(job, internship_only, job_level, stipend_min)
+        ]
+        
         logger.info(f"Local RAG: {len(filtered_candidates)} jobs passed hard filters")
 
-        # Score jobs
-        scored_jobs = []
-        for job in filtered_candidates:
-            score = LocalRAGMatcher.match_resume_to_job(resume_text, job)
-            if score > 0.05: # Minimum relevance threshold
-                scored_jobs.append((job, score))
-        
-        # Sort by score
-        scored_jobs.sort(key=lambda x: x[1], reverse=True)
+        # Score jobs (CPU-bound, so keep it off the event loop);
+        # 0.05 is the minimum relevance threshold
+        scored_jobs = await asyncio.to_thread(
+            LocalRAGMatcher.rank_jobs, resume_text, filtered_candidates, 0.05
+        )
         
         # Take top N
         top_results = scored_jobs[:max_results]
@@ -414,17 +607,110 @@ class MatchingService:
         
         logger.info(f"Local RAG: Found {len(jobs)} matches (top score: {top_results[0][1] if top_results else 0.0:.3f})")
         
+        responses = self._build_match_responses(jobs, score_map)
+        
         # Cache results
-        if jobs:
-            cache_data = [
-                 {"job_id": str(j["_id"]), "score": s}
-                 for j, s in top_results
-            ]
+        if responses:
+            _match_cache[cache_key] = responses
             await self._cache_results(
-                cache_key, cache_data, location, internship_only, job_level, stipend_min
+                cache_key, [r.dict() for r in responses], location, internship_only, job_level, stipend_min
             )
             
-        return self._build_match_responses(jobs, score_map)
+        return list(responses)
+    
+    async def _load_match_candidates(
+        self,
+        location: Optional[str],
+        profiles_by_id: Dict[Any, Dict[str, Any]]
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Active jobs for one location filter (same query and cap as match_resume_to_jobs),
+        paired with their job profiles; profiles_by_id shares profiles across calls
+        
+        Returns:
+            (job, profile) pairs
+        """
+        query_filter = {"status": "active"}
+        if location:
+            query_filter["location"] = {"$regex": location, "$options": "i"}
+        
+        cursor = self.jobs_collection.find(query_filter, projection=MATCH_CANDIDATE_PROJECTION)
+        candidate_jobs = await cursor.to_list(length=5000)
+        
+        new_jobs = [job for job in candidate_jobs if job["_id"] not in profiles_by_id]
+        new_profiles = await asyncio.to_thread(
+            lambda: [LocalRAGMatcher.build_job_profile(job) for job in new_jobs]
+        )
+        profiles_by_id.update(zip((job["_id"] for job in new_jobs), new_profiles))
+        
+        return [(job, profiles_by_id[job["_id"]]) for job in candidate_jobs]
+    
+    async def match_subscriptions(
+        self,
+        subscriptions: List[Dict[str, Any]],
+        max_results: int = 10
+    ) -> List[Tuple[Dict[str, Any], List[JobMatchResponse]]]:
+        """
+        Match many subscribers' resumes in one pass
+        
+        Active jobs are read once per distinct location and each job's text
+        features extracted once, then every resume is scored against the
+        shared job profiles (match_resume_to_jobs would re-read and re-clean
+        them per resume). A subscription that fails to match is logged and
+        left out instead of failing the whole run.
+        
+        Returns:
+            (subscription, matches) pairs, in subscription order
+        """
+        if not subscriptions:
+            return []
+        
+        # The location filter runs in Mongo before the cap, as in match_resume_to_jobs
+        profiles_by_id: Dict[Any, Dict[str, Any]] = {}
+        candidates_by_location: Dict[Optional[str], List[Tuple[Dict[str, Any], Dict[str, Any]]]] = {}
+        for location in dict.fromkeys(sub.get("location") or None for sub in subscriptions):
+            try:
+                candidates_by_location[location] = await self._load_match_candidates(location, profiles_by_id)
+            except Exception as e:
+                logger.error(f"Failed to load candidate jobs for location {location!r}: {str(e)}")
+        
+        logger.info(
+            f"Local RAG: Scoring {len(subscriptions)} resumes against {len(profiles_by_id)} jobs "
+            f"({len(candidates_by_location)} locations)"
+        )
+        
+        results = []
+        for sub in subscriptions:
+            location = sub.get("location") or None
+            if location not in candidates_by_location:
+                logger.warning(f"Skipping {sub.get('email')}: no candidate jobs for location {location!r}")
+                continue
+            
+            try:
+                filtered = [
+                    (job, profile) for job, profile in candidates_by_location[location]
+                    if _passes_hard_filters(
+                        job, sub.get("internship_only", False), sub.get("job_level"), sub.get("stipend_min")
+                    )
+                ]
+                
+                # Subscriptions store their resume profile; older ones are profiled here
+                resume_profile = LocalRAGMatcher.resume_profile_from_doc(sub.get("resume_profile"))
+                if resume_profile is None:
+                    resume_profile = await asyncio.to_thread(
+                        LocalRAGMatcher.build_resume_profile, sub.get("resume_text", "")
+                    )
+                
+                scored_jobs = await asyncio.to_thread(
+                    LocalRAGMatcher.rank_job_profiles, resume_profile, filtered, 0.05
+                )
+                top_results = scored_jobs[:max_results]
+                score_map = {str(job["_id"]): score for job, score in top_results}
+                results.append((sub, self._build_match_responses([job for job, _ in top_results], score_map)))
+            except Exception as e:
+                logger.error(f"Matching failed for {sub.get('email')}: {str(e)}")
+        
+        return results
     
     async def match_jd_to_jobs(
         self,
@@ -456,7 +742,7 @@ class MatchingService:
         cursor = self.jobs_collection.find({
             "requisition_id": {"$in": requisition_ids},
             "status": "active"
-        })
+        }, projection=MATCH_CANDIDATE_PROJECTION)
         jobs = await cursor.to_list(length=len(requisition_ids))
         
         # Build score map
@@ -501,15 +787,19 @@ class MatchingService:
         jobs: List[Dict[str, Any]],
         score_map: Dict[str, float]
     ) -> List[JobMatchResponse]:
-        """Build JobMatchResponse objects from jobs and scores"""
+        """
+        Build JobMatchResponse objects from jobs and scores
+        
+        Jobs come from our own collection, so validation is skipped (model_construct)
+        """
         responses = []
         
         for job in jobs:
             job_id_str = str(job["_id"])
-            description = job.get("description", "")
+            description = job.get("description") or ""
             truncated_desc = description[:500] + "..." if len(description) > 500 else description
             
-            response = JobMatchResponse(
+            response = JobMatchResponse.model_construct(
                 job_id=job_id_str,
                 adzuna_id=job["adzuna_id"],
                 title=job["title"],
@@ -529,3 +819,8 @@ class MatchingService:
         responses.sort(key=lambda x: x.relevance_score, reverse=True)
         
         return responses
+
+
+async def get_matching_service(request: Request) -> MatchingService:
+    """FastAPI dependency returning the app-wide MatchingService built at startup"""
+    return request.app.state.matching_service
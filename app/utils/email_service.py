@@ -1,12 +1,24 @@
 import boto3
 from botocore.exceptions import ClientError
 import logging
+from functools import lru_cache
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+@lru_cache()
+def get_ses_client():
+    """Process-wide SES client (boto3 clients are thread-safe; sessions are not)"""
+    return boto3.client(
+        'ses',
+        region_name=settings.AWS_SES_REGION,
+        aws_access_key_id=settings.AWS_SES_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SES_SECRET_ACCESS_KEY
+    )
+
+
 class EmailService:
     """Email service using AWS SES"""
     
@@ -14,13 +26,7 @@ class EmailService:
     def send_email(to_email: str, subject: str, body_html: str):
         """Send email using AWS SES"""
         try:
-            # Create SES client
-            ses_client = boto3.client(
-                'ses',
-                region_name=settings.AWS_SES_REGION,
-                aws_access_key_id=settings.AWS_SES_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SES_SECRET_ACCESS_KEY
-            )
+            ses_client = get_ses_client()
             
             # Send email
             response = ses_client.send_email(
@@ -1,12 +1,57 @@
+import asyncio
 import io
 import logging
-from typing import Optional
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Optional
 from fastapi import UploadFile, HTTPException
 import PyPDF2
 from docx import Document
 
 logger = logging.getLogger(__name__)
 
+# PDF/DOCX parsing is CPU-bound and holds the GIL, so it runs in worker
+# processes shared by all requests (created on first use)
+PARSER_POOL_WORKERS = os.cpu_count() or 1
+
+_parser_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_parser_pool() -> ProcessPoolExecutor:
+    """Get the shared resume parsing process pool"""
+    global _parser_pool
+    if _parser_pool is None:
+        # The pool starts after logging, pymongo and gRPC threads are running, and
+        # forking a multithreaded process can leave children deadlocked
+        _parser_pool = ProcessPoolExecutor(
+            max_workers=PARSER_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver")
+        )
+    return _parser_pool
+
+
+def _worker_ready() -> bool:
+    """No-op task used to start parser workers"""
+    return True
+
+
+async def warm_parser_pool():
+    """Start all parser workers up front so the first upload doesn't pay for process startup"""
+    pool = get_parser_pool()
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(
+        loop.run_in_executor(pool, _worker_ready) for _ in range(PARSER_POOL_WORKERS)
+    ))
+
+
+def shutdown_parser_pool():
+    """Stop the resume parsing workers"""
+    global _parser_pool
+    if _parser_pool is not None:
+        _parser_pool.shutdown(wait=False, cancel_futures=True)
+        _parser_pool = None
+
 
 class ResumeParser:
     """
@@ -24,6 +69,8 @@ class ResumeParser:
     
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     
+    READ_CHUNK_SIZE = 64 * 1024  # Upload is read in 64KB chunks
+    
     @staticmethod
     async def parse_resume(file: UploadFile) -> str:
         """
@@ -42,30 +89,16 @@ class ResumeParser:
             # Validate file
             ResumeParser._validate_file(file)
             
-            # Read file content
-            content = await file.read()
-            
-            # Check file size
-            if len(content) > ResumeParser.MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"File too large. Maximum size is {ResumeParser.MAX_FILE_SIZE / (1024*1024)}MB"
-                )
-            
-            # Parse based on file type
             filename_lower = file.filename.lower()
             
-            if filename_lower.endswith('.pdf'):
-                text = ResumeParser._parse_pdf(content)
-            elif filename_lower.endswith('.docx'):
-                text = ResumeParser._parse_docx(content)
-            elif filename_lower.endswith('.txt'):
-                text = ResumeParser._parse_txt(content)
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported file format. Allowed: {', '.join(ResumeParser.ALLOWED_EXTENSIONS)}"
-                )
+            # Read in bounded chunks, rejecting oversized files as soon as they
+            # cross the limit, then parse in the worker pool (only the bytes
+            # and the filename are sent to the worker)
+            content = await ResumeParser._read_capped(file)
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(
+                get_parser_pool(), ResumeParser.parse_bytes, content, filename_lower
+            )
             
             # Validate extracted text
             if not text or len(text.strip()) < 50:
@@ -86,6 +119,39 @@ class ResumeParser:
                 detail=f"Failed to parse resume: {str(e)}"
             )
     
+    @staticmethod
+    async def _read_capped(file: UploadFile) -> bytes:
+        """Read the upload, raising 413 once it exceeds MAX_FILE_SIZE"""
+        chunks = []
+        size = 0
+        while True:
+            chunk = await file.read(ResumeParser.READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > ResumeParser.MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size is {ResumeParser.MAX_FILE_SIZE / (1024*1024)}MB"
+                )
+            chunks.append(chunk)
+        return b"".join(chunks)
+    
+    @staticmethod
+    def parse_bytes(content: bytes, filename_lower: str) -> str:
+        """
+        Parse resume bytes based on the file extension
+        
+        Runs in the parser process pool, so it only raises plain exceptions.
+        """
+        if filename_lower.endswith('.pdf'):
+            return ResumeParser._parse_pdf(io.BytesIO(content))
+        elif filename_lower.endswith('.docx'):
+            return ResumeParser._parse_docx(io.BytesIO(content))
+        elif filename_lower.endswith('.txt'):
+            return ResumeParser._parse_txt(content)
+        raise ValueError(f"Unsupported file format: {filename_lower}")
+    
     @staticmethod
     def _validate_file(file: UploadFile) -> None:
         """Validate file type and extension"""
@@ -101,11 +167,10 @@ class ResumeParser:
             )
     
     @staticmethod
-    def _parse_pdf(content: bytes) -> str:
+    def _parse_pdf(stream: BinaryIO) -> str:
         """Extract text from PDF file"""
         try:
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
+            pdf_reader = PyPDF2.PdfReader(stream)
             
             text_parts = []
             for page in pdf_reader.pages:
@@ -119,11 +184,10 @@ class ResumeParser:
             raise Exception(f"Failed to parse PDF: {str(e)}")
     
     @staticmethod
-    def _parse_docx(content: bytes) -> str:
+    def _parse_docx(stream: BinaryIO) -> str:
         """Extract text from DOCX file"""
         try:
-            docx_file = io.BytesIO(content)
-            doc = Document(docx_file)
+            doc = Document(stream)
             
             text_parts = []
             for paragraph in doc.paragraphs: